@@ -0,0 +1,22 @@
+"""
+Checks of single-pass column aggregation.
+Run with `python -m unittest discover tests`.
+"""
+import unittest
+
+from vtable import VTable
+
+
+class AggregateTest(unittest.TestCase):
+
+    def test_text_column_needs_text_reductions(self):
+        for columnar in (False, True):
+            table = VTable(['h', 'SKU'], [], columnar=columnar)
+            table.extend_rows([['1', 'b'], ['2', 'a'], ['3', None]])
+            with self.assertRaises(ValueError):
+                table.aggregate('SKU')
+            self.assertEqual(table.aggregate('SKU', ['count', 'min', 'max']), {'count': 2, 'min': 'a', 'max': 'b'})
+
+
+if __name__ == '__main__':
+    unittest.main()
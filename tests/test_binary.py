@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Round trips of tables through binary snapshots, loaded back whole and memory mapped.
+Run with `python -m unittest discover tests`.
+"""
+import os
+import tempfile
+import unittest
+
+from vtable import VTable, binary
+
+
+class BinaryRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def table(self, rows, columnar=False, dtypes=None):
+        table = VTable(['h', 'i', 'f', 'b', 's', 'u', 'o'], [], columnar=columnar, dtypes=dtypes)
+        table.extend_rows(rows)
+        return table
+
+    def rows(self, size):
+        values = [
+            [0, -1, 127, -128, 1 << 15, -(1 << 31), (1 << 63) - 1, -(1 << 63), 1 << 70, None],
+            [0.5, -2.25, None],
+            [True, False, None],
+            ['plain', 'nul\0inside', '', None],
+            [u'caf\xe9', u'☃', u'', None],
+            [1, 'x', (1, 2), None, 1.5],
+        ]
+        return [['r{}'.format(i)] + [column[i % len(column)] for column in values] for i in xrange(size)]
+
+    def assertSameTable(self, table, loaded):
+        self.assertEqual(loaded.column_headers, table.column_headers)
+        self.assertEqual(list(loaded.row_headers), table.row_headers)
+        self.assertEqual([row.as_list() for row in loaded.rows], [row.as_list() for row in table.rows])
+
+    def round_trips(self, table):
+        for columnar in (False, True):
+            yield VTable.load_binary(table.dump_binary(), columnar=columnar)
+        with open(self.path, 'wb') as fileobj:
+            table.dump_binary_to(fileobj)
+        yield VTable.read_binary(self.path)
+        mapped = VTable.open_binary(self.path)
+        try:
+            yield mapped
+        finally:
+            mapped.close()
+
+    def test_values_and_sizes(self):
+        for size in (0, 1, 64, 65, 200):
+            for columnar in (False, True):
+                table = self.table(self.rows(size), columnar=columnar)
+                for loaded in self.round_trips(table):
+                    self.assertSameTable(table, loaded)
+
+    def test_typed_columns(self):
+        dtypes = {'i': 'int', 'f': 'float', 'b': 'bool', 's': 'string'}
+        rows = [['r{}'.format(i), i * 1000 if i % 3 else None, i / 4.0, i % 2 == 0, str(i), None, None]
+                for i in xrange(70)]
+        table = self.table(rows, dtypes=dtypes)
+        for loaded in self.round_trips(table):
+            self.assertSameTable(table, loaded)
+            self.assertEqual(loaded.dtypes, table.dtypes)
+
+    def test_mapped_lookup(self):
+        table = self.table(self.rows(200))
+        with open(self.path, 'wb') as fileobj:
+            table.dump_binary_to(fileobj)
+        with VTable.open_binary(self.path) as mapped:
+            self.assertIsNotNone(mapped.table_data._lookup)
+            for row in table.rows:
+                self.assertEqual(mapped.get_row(row.header).as_list(), row.as_list())
+            for missing in ('', 'r', 'r200', 'r99x', 'zzz', u'r1\u2603', 5):
+                self.assertNotIn(missing, mapped.table_data)
+            with self.assertRaises(KeyError):
+                mapped['i', 'r200']
+
+    def test_mapped_lookup_without_lookup_blocks(self):
+        table = VTable(['h', 'A'], [])
+        table.extend_rows([[1, 'int'], ['1', 'str'], [None, 'none']])
+        with open(self.path, 'wb') as fileobj:
+            table.dump_binary_to(fileobj)
+        with VTable.open_binary(self.path) as mapped:
+            self.assertIsNone(mapped.table_data._lookup)
+            self.assertEqual([mapped['A', header] for header in (1, '1', None)], ['int', 'str', 'none'])
+            self.assertNotIn(2, mapped.table_data)
+
+    def test_rejects_other_versions(self):
+        data = VTable(['h', 'A'], ['1']).dump_binary()
+        meta = binary.read_meta(data)
+        self.assertEqual(meta['version'], binary.VERSION)
+        with self.assertRaises(ValueError):
+            binary.read_meta('not a snapshot' * 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
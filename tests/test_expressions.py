@@ -0,0 +1,23 @@
+"""
+Checks that compiled expressions match the same rows whatever else is in the chunk being tested.
+Run with `python -m unittest discover tests`.
+"""
+import unittest
+
+from vtable import VTable, col
+
+
+class StringTestTest(unittest.TestCase):
+
+    def test_non_strings_never_match(self):
+        for columnar in (False, True):
+            table = VTable(['h', 'A'], [], columnar=columnar)
+            table.extend_rows([['1', 'abc'], ['2', ['b']], ['3', ('b',)], ['4', None]])
+            for expression in (col('A').contains('b'), col('A').startswith('a'), col('A').endswith('c')):
+                self.assertEqual([row.header for row in table.filter(expression)], ['1'])
+            table.extend_rows([['5', 5]])
+            self.assertEqual([row.header for row in table.filter(col('A').contains('b'))], ['1'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Regression tests for the rollback of batched writes to indexed tables.
+Run with `python -m unittest discover tests`.
+"""
+import unittest
+
+from vtable import VTable
+
+
+class WriteRollbackTest(unittest.TestCase):
+
+    def tables(self):
+        for columnar in (False, True):
+            table = VTable(['row_headers', 'Q', 'Box'], [], columnar=columnar)
+            table.extend_rows([['1', 5, 1], ['2', 6, 2], ['3', 7, 3]])
+            table.create_index('Box', unique=True)
+            yield table
+
+    def assertUnchanged(self, table):
+        self.assertEqual([row.as_list() for row in table.rows], [['1', 5, 1], ['2', 6, 2], ['3', 7, 3]])
+        self.assertEqual([row.header for row in table.find('Box', 1)], ['1'])
+        self.assertEqual([row.header for row in table.find('Box', 2)], ['2'])
+
+    def test_set_many_restores_unindexed_cells(self):
+        for table in self.tables():
+            with self.assertRaises(ValueError):
+                table.set_many([('Q', '1', 100), ('Box', '2', 1)])
+            self.assertUnchanged(table)
+
+    def test_update_restores_unindexed_cells(self):
+        for table in self.tables():
+            with self.assertRaises(ValueError):
+                table.update({'1': {'Q': 100}, '2': {'Q': 200, 'Box': 3}})
+            self.assertUnchanged(table)
+
+    def test_set_cell_value_restores_indexed_cell(self):
+        for table in self.tables():
+            with self.assertRaises(ValueError):
+                table['Box', '3'] = 2
+            self.assertUnchanged(table)
+
+    def test_successful_batch_updates_index(self):
+        for table in self.tables():
+            table.set_many([('Q', '1', 100), ('Box', '1', 4)])
+            self.assertEqual(table['Q', '1'], 100)
+            self.assertEqual([row.header for row in table.find('Box', 4)], ['1'])
+            self.assertEqual(table.find('Box', 1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+"""
+Checks that parallel loading parses files the same way as the sequential loaders.
+Run with `python -m unittest discover tests`.
+"""
+import os
+import tempfile
+import unittest
+
+from vtable import VTable, parallel
+
+
+class ParallelLoadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.min_parallel_size = parallel.MIN_PARALLEL_SIZE
+        parallel.MIN_PARALLEL_SIZE = 0
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        parallel.MIN_PARALLEL_SIZE = self.min_parallel_size
+        os.remove(self.path)
+
+    def write(self, contents):
+        with open(self.path, 'wb') as fileobj:
+            fileobj.write(contents)
+
+    def test_flat_file_splits_on_newlines_only(self):
+        self.write('h\tA\n1\ta\rb\n\n2\tc\r\n' + ''.join('{0}x\t{0}\n'.format(i) for i in range(100)))
+        sequential = VTable.read_flat_file(self.path, '\t')
+        for processes in (1, 2):
+            table = VTable.read_flat_file_parallel(self.path, '\t', processes=processes)
+            self.assertEqual([row.as_list() for row in table.rows], [row.as_list() for row in sequential.rows])
+        self.assertEqual(sequential['A', '1'], 'a\rb')
+
+    def test_csv_matches_sequential(self):
+        self.write('h,A\n1,"a\rb"\n\n2,c\r\n' + ''.join('{0}x,{0}\n'.format(i) for i in range(100)))
+        sequential = VTable.read_csv(self.path)
+        for processes in (1, 2):
+            table = VTable.read_csv_parallel(self.path, processes=processes)
+            self.assertEqual([row.as_list() for row in table.rows], [row.as_list() for row in sequential.rows])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Round trips of tables through pickle and copy.deepcopy.
+Run with `python -m unittest discover tests`.
+"""
+import copy
+import pickle
+import unittest
+
+from vtable import VTable, VSchema
+
+
+class PickleTest(unittest.TestCase):
+
+    def tables(self):
+        for columnar in (False, True):
+            table = VTable(['h', 'A', 'B'], ['1', '2'], columnar=columnar)
+            table['A', '1'] = 'x'
+            table['B', '2'] = 5
+            table.create_index('A')
+            yield table
+
+    def assertSameTable(self, table, copied):
+        self.assertEqual([row.as_list() for row in copied.rows], [row.as_list() for row in table.rows])
+        self.assertEqual(copied.schema, table.schema)
+        self.assertEqual([row.header for row in copied.find('A', 'x')], ['1'])
+        copied['A', '2'] = 'y'
+        self.assertEqual(table['A', '2'], None)
+
+    def test_schema_round_trip(self):
+        schema = VSchema(['h', 'A'])
+        self.assertEqual(pickle.loads(pickle.dumps(schema, 2)), schema)
+        self.assertEqual(copy.deepcopy(schema).position('A'), 1)
+
+    def test_pickle_protocol_0(self):
+        for table in self.tables():
+            self.assertSameTable(table, pickle.loads(pickle.dumps(table)))
+
+    def test_pickle_rows(self):
+        for table in self.tables():
+            row = pickle.loads(pickle.dumps(table.get_row('1')))
+            self.assertEqual(row.as_list(), ['1', 'x', None])
+            self.assertEqual(row['A'], 'x')
+
+    def test_pickle_protocol_2(self):
+        for table in self.tables():
+            self.assertSameTable(table, pickle.loads(pickle.dumps(table, 2)))
+
+    def test_deepcopy(self):
+        for table in self.tables():
+            self.assertSameTable(table, copy.deepcopy(table))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Regression tests for writes to typed columns which fail part-way through a row or a batch.
+Run with `python -m unittest discover tests`.
+"""
+import unittest
+
+from vtable import VTable
+
+
+class TypedRowTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = VTable(['h', 'U', 'V'], ['a', 'b'], dtypes={'U': 'int'})
+
+    def assertUnchanged(self):
+        store = self.table._store
+        self.assertEqual([len(column) for column in store.data], [2, 2, 2])
+        self.assertEqual(store.size, 2)
+        self.assertEqual(self.table.row_headers, ['a', 'b'])
+
+    def test_append_row_rejects_whole_row(self):
+        with self.assertRaises(ValueError):
+            self.table.append_row('c', {'U': 'abc', 'V': 'x'})
+        self.assertUnchanged()
+        row = self.table.append_row('d', {'U': '3'})
+        self.assertEqual(row.as_list(), ['d', 3, None])
+
+    def test_insert_row_rejects_whole_row(self):
+        with self.assertRaises(ValueError):
+            self.table.insert_row(0, 'c', {'U': 'abc'})
+        self.assertUnchanged()
+        self.assertEqual([row.header for row in self.table.rows], ['a', 'b'])
+
+    def test_extend_rows_rolls_back(self):
+        with self.assertRaises(ValueError):
+            self.table.extend_rows([['c', 1], ['d', 'abc']])
+        self.assertUnchanged()
+
+
+class TypedBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = VTable(['h', 'U', 'V'], ['a', 'b'], dtypes={'U': 'int'})
+
+    def test_set_many_sets_nothing_on_bad_value(self):
+        with self.assertRaises(ValueError):
+            self.table.set_many([('V', 'a', 'x'), ('U', 'a', 1), ('U', 'b', 'abc')])
+        self.assertEqual([row.as_list() for row in self.table.rows], [['a', None, None], ['b', None, None]])
+
+    def test_update_sets_nothing_on_bad_value(self):
+        with self.assertRaises(ValueError):
+            self.table.update({'a': {'U': 1, 'V': 'x'}, 'b': {'U': 'abc'}})
+        self.assertEqual([row.as_list() for row in self.table.rows], [['a', None, None], ['b', None, None]])
+
+    def test_batch_converts_values(self):
+        self.table.set_many([('U', 'a', '1')])
+        self.table.update({'b': {'U': '2'}})
+        self.assertEqual(list(self.table.column('U').iter_values()), [1, 2])
+
+
+class AddColumnTest(unittest.TestCase):
+
+    def test_failed_typed_column_leaves_no_dtype(self):
+        table = VTable(['h', 'U'], ['a', 'b'], dtypes={'U': 'int'})
+        with self.assertRaises(ValueError):
+            table.add_column('N', default='x', dtype='int')
+        self.assertEqual(table.dtypes, {'U': 'int'})
+        self.assertEqual(table.column_headers, ['h', 'U'])
+        table.add_column('N', default='hello')
+        self.assertEqual(list(table.column('N').iter_values()), ['hello', 'hello'])
+
+
+if __name__ == '__main__':
+    unittest.main()
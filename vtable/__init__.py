@@ -6,10 +6,291 @@ Think of the VTable object like a BINGO sheet, to reference the cell value you w
 """
 import json
 import csv
+import heapq
+import operator
 import StringIO
+from itertools import izip, chain
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
-class VRow(object):
+from vtable.columns import TypedColumn, NumpyColumn, make_column, dtype_name
+from vtable.indexes import INDEX_KINDS, SortedIndex
+from vtable import binary, parallel
+
+
+# The operators supported by VTable.combine_columns. Each works on plain values as well as numpy arrays.
+OPERATORS = {
+    '+': operator.add,
+    '-': operator.sub,
+    '*': operator.mul,
+    '/': operator.truediv,
+}
+
+# The reductions supported by VTable.aggregate.
+AGGREGATES = ('sum', 'count', 'min', 'max', 'mean')
+
+# The sort directions supported by VTable.sort_by.
+DIRECTIONS = ('asc', 'desc')
+
+
+def _convert(val, replacement):
+    """
+    Used when exporting to text to remove any unicode decode errors and convert the val to a string so that
+    String.join() can be called on a list of the values for each column in a row.
+    :param val: The value to convert to a string
+    :param replacement: The replacement character for any NoneType objects
+    :return: The string value of the val param
+    """
+    if val is None:
+        return replacement
+    if isinstance(val, str):
+        return val
+    return str(val)
+
+
+def _open_source(source, mode='rb'):
+    """
+    Open a file path for reading or pass through an already open file object.
+    :param source: A file path or a file like object.
+    :param mode: The mode to open file paths with.
+    :return: A tuple of the file object and whether the caller is responsible for closing it.
+    """
+    if isinstance(source, basestring):
+        return open(source, mode), True
+    return source, False
+
+
+def _is_numeric(values):
+    """
+    Return True if every value is an int, long or float. Booleans and None are not numeric.
+    :param values: A list of values.
+    :return: bool
+    """
+    for value in values:
+        if isinstance(value, bool) or not isinstance(value, (int, long, float)):
+            return False
+    return True
+
+
+class Aggregator(object):
+    """
+    Computes several reductions over a stream of values in a single pass. None values are skipped.
+    The sum of no values is 0, the min, max and mean of no values is None.
+
+    Usage:
+        >>> agg = Aggregator(['sum', 'max'])
+        >>> agg.update([1, 5, None, 3])
+        >>> print agg.result()
+        >>> # {'sum': 9, 'max': 5}
+    """
+
+    __slots__ = ('reductions', 'count', 'total', 'minimum', 'maximum', '_track_sum', '_track_range')
+
+    def __init__(self, reductions=AGGREGATES):
+        """
+        :param reductions: An iterable of reduction names from AGGREGATES.
+        """
+        self.reductions = tuple(reductions)
+        for reduction in self.reductions:
+            if reduction not in AGGREGATES:
+                raise ValueError("Unsupported aggregate '{}'.".format(reduction))
+        self.count = 0
+        self.total = 0
+        self.minimum = None
+        self.maximum = None
+        self._track_sum = 'sum' in self.reductions or 'mean' in self.reductions
+        self._track_range = 'min' in self.reductions or 'max' in self.reductions
+
+    def add(self, value):
+        """
+        Add a single value.
+        :param value: The value to add.
+        :return:
+        """
+        if value is None:
+            return
+        self.count += 1
+        if self._track_sum:
+            self.total += value
+        if self._track_range:
+            if self.count == 1 or value < self.minimum:
+                self.minimum = value
+            if self.count == 1 or value > self.maximum:
+                self.maximum = value
+
+    def update(self, values):
+        """
+        Add every value of an iterable.
+        :param values: An iterable of values.
+        :return:
+        """
+        count, total, minimum, maximum = self.count, self.total, self.minimum, self.maximum
+        track_sum, track_range = self._track_sum, self._track_range
+        for value in values:
+            if value is None:
+                continue
+            count += 1
+            if track_sum:
+                total += value
+            if track_range:
+                if count == 1 or value < minimum:
+                    minimum = value
+                if count == 1 or value > maximum:
+                    maximum = value
+        self.count, self.total, self.minimum, self.maximum = count, total, minimum, maximum
+
+    def update_array(self, array):
+        """
+        Add every value of a numpy array which holds no missing values.
+        :param array: A numpy array.
+        :return:
+        """
+        if not len(array):
+            return
+        if self._track_sum:
+            self.total += array.sum().item()
+        if self._track_range:
+            minimum, maximum = array.min().item(), array.max().item()
+            if not self.count or minimum < self.minimum:
+                self.minimum = minimum
+            if not self.count or maximum > self.maximum:
+                self.maximum = maximum
+        self.count += len(array)
+
+    def result(self):
+        """
+        Return the computed reductions.
+        :return: A dictionary of reduction name -> value.
+        """
+        values = {
+            'sum': self.total,
+            'count': self.count,
+            'min': self.minimum,
+            'max': self.maximum,
+            'mean': float(self.total) / self.count if self.count else None,
+        }
+        return {reduction: values[reduction] for reduction in self.reductions}
+
+
+class VSchema(object):
+    """
+    The immutable column ordering of a table.
+    A table builds one schema from its column headers and shares it with every row so the header -> position
+      lookup is computed once instead of once per row.
+
+    Usage:
+        >>> schema = VSchema(['row_headers', 'A', 'B'])
+        >>> print schema.position('B')
+        >>> # 2
+    """
+
+    __slots__ = ('headers', 'positions')
+
+    def __init__(self, column_headers):
+        """
+        :param column_headers: A list of the column headers used in your table.
+        """
+        object.__setattr__(self, 'headers', tuple(column_headers))
+        object.__setattr__(self, 'positions', {header: i for i, header in enumerate(self.headers)})
+
+    def position(self, column_header):
+        """
+        Return the position of a column header.
+        :param column_header: The column header.
+        :return: int
+        """
+        return self.positions[column_header]
+
+    def insert(self, position, column_header):
+        """
+        Return a new schema with a column header inserted before position.
+        :param position: The position to insert the column at.
+        :param column_header: The new column header.
+        :return: VSchema
+        """
+        headers = list(self.headers)
+        headers.insert(position, column_header)
+        return VSchema(headers)
+
+    def remove(self, column_header):
+        """
+        Return a new schema without a column header.
+        :param column_header: The column header to remove.
+        :return: VSchema
+        """
+        headers = list(self.headers)
+        del headers[self.positions[column_header]]
+        return VSchema(headers)
+
+    def __setattr__(self, key, value):
+        raise AttributeError('VSchema is immutable.')
+
+    def __reduce__(self):
+        return VSchema, (list(self.headers),)
+
+    def __contains__(self, item):
+        return item in self.positions
+
+    def __iter__(self):
+        return iter(self.headers)
+
+    def __len__(self):
+        return len(self.headers)
+
+    def __eq__(self, other):
+        return isinstance(other, VSchema) and self.headers == other.headers
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.headers)
+
+    def __repr__(self):
+        return 'VSchema({})'.format(list(self.headers))
+
+
+class VRowBase(object):
+    """
+    The methods shared by every row type. Subclasses provide as_list, as_dict, header, _set_header,
+      __getitem__ and __setitem__ on top of their own storage.
+    """
+
+    __slots__ = ()
+
+    def _convert(self, val, replacement):
+        """
+        Used when to_text is called to remove any unicode decode errors and convert the val to a string so that
+        String.join() can be called on a list of the values for each column in this row.
+        :param val: The value to convert to a string
+        :param replacement: The replacement character for any NoneType objects
+        :return: The string value of the val param
+        """
+        return _convert(val, replacement)
+
+    def as_text(self, delim, none_value_replacement=''):
+        """
+        Return the contents of the row as a text delimited string.
+        :param delim: The delimiter to use to separate the column values of this row.
+        :param none_value_replacement: The replacement character to replace NoneType objects with.
+        :return:
+        """
+        return delim.join([self._convert(x, none_value_replacement) for x in self.as_list()])
+
+    def __iter__(self):
+        return self.as_list().__iter__()
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return str(self.as_list())
+
+
+class VRow(VRowBase):
     """
     A dictionary wrapper object used to maintain index integrity as well as store column values for a row.
     Use just like a dictionary.
@@ -26,40 +307,33 @@ class VRow(object):
         >>> vr['3'] = 'test value'
         >>> print vr
         >>> # ['test row header', None, 'test value']
+
+    The row keeps its values in a flat list and resolves column headers through the table's VSchema. __slots__
+      is used so a row costs a few dozen bytes on top of its value list.
     """
 
+    __slots__ = ('_schema', '_values', 'index')
+
     def __init__(self, column_headers, row_header, index=0):
         """
 
-        :param column_headers: A list of the column headers used in your table.
+        :param column_headers: A list of the column headers used in your table or the table's VSchema.
         :param row_header: The hashable object used as the row header for this row.
         :param index: Used to maintain ordering integrity when displaying the table.
         """
-        self._d = {header: dict(value=None, index=i) for i, header in enumerate(column_headers)}
+        if not isinstance(column_headers, VSchema):
+            column_headers = VSchema(column_headers)
+        self._schema = column_headers
+        self._values = [None] * len(column_headers)
         self._set_header(row_header)
         self.index = index
 
-    def _convert(self, val, replacement):
-        """
-        Used when to_text is called to remove any unicode decode errors and convert the val to a string so that
-        String.join() can be called on a list of the values for each column in this row.
-        :param val: The value to convert to a string
-        :param replacement: The replacement character for any NoneType objects
-        :return: The string value of the val param
-        """
-        if val is None:
-            return replacement
-        if isinstance(val, str):
-            return val
-        return str(val)
-
     def as_list(self):
         """
-        Return the contents of the row as a list. The internal dictionary is sorted by the index key to maintain
-            ordering integrity.
+        Return the contents of the row as a list in column order.
         :return: list
         """
-        return [v['value'] for k, v in sorted(self._d.items(), key=lambda x: x[1]['index'])]
+        return list(self._values)
 
     def as_dict(self):
         """
@@ -67,92 +341,718 @@ class VRow(object):
             the row's column's value.
         :return:
         """
-        d = {k: v['value'] for k, v in self._d.items()}
+        d = dict(zip(self._schema.headers, self._values))
         d.update({'_index': self.index})
         return d
 
-    def as_text(self, delim, none_value_replacement=''):
+    @property
+    def header(self):
         """
-        Return the contents of the row as a text delimited string.
-        :param delim: The delimiter to use to separate the column values of this row.
-        :param none_value_replacement: The replacement character to replace NoneType objects with.
+        Return the row header.
         :return:
         """
-        return delim.join([self._convert(x, none_value_replacement) for x in self.as_list()])
+        return self._values[0]
+
+    def _set_header(self, header):
+        """
+        Set the row header.
+        :param header: The hashable object to use as this rows header value.
+        :return:
+        """
+        self._values[0] = header
+
+    def __getitem__(self, item):
+        return self._values[self._schema.positions[item]]
+
+    def __setitem__(self, key, value):
+        self._values[self._schema.positions[key]] = value
+
+    def __getstate__(self):
+        return self._schema, self._values, self.index
+
+    def __setstate__(self, state):
+        self._schema, self._values, self.index = state
+
+
+class ColumnStore(object):
+    """
+    Column oriented storage for a VTable.
+    Each column's values are kept in a single contiguous list and a header -> position map shared by every row
+      is used to find the list for a column header. Rows are stored by position so the n-th value of every
+      column list belongs to the n-th row.
+
+    Usage:
+        >>> store = ColumnStore(['row_headers', 'A', 'B'])
+        >>> row = store.append_row(['1'])
+        >>> row['A'] = 'X'
+        >>> print store.column('A')
+        >>> # ['X']
+
+    Columns can be given a dtype ('int', 'float', 'bool' or 'string'), in which case they are stored in a
+      TypedColumn which converts values on write. int, float and bool columns are backed by numpy arrays when
+      numpy is installed.
+    """
+
+    def __init__(self, column_headers, dtypes=None):
+        """
+        :param column_headers: A list of the column headers used in your table or the table's VSchema.
+        :param dtypes: A dictionary of column header -> dtype for the columns which should be typed.
+        """
+        if not isinstance(column_headers, VSchema):
+            column_headers = VSchema(column_headers)
+        self.schema = column_headers
+        self.dtypes = {}
+        for column_header, dtype in (dtypes or {}).items():
+            if column_header not in self.schema.positions:
+                raise KeyError("'{}' not in column headers.".format(column_header))
+            if self.schema.positions[column_header] == 0:
+                raise ValueError('The row header column can not be typed.')
+            self.dtypes[column_header] = dtype_name(dtype)
+        self.data = [self._new_column(header) for header in self.schema]
+        self.size = 0
+
+    def _new_column(self, column_header, values=()):
+        """
+        Create the storage for a column.
+        :param column_header: The column header.
+        :param values: The initial values of the column.
+        :return: A list, or a TypedColumn for typed columns.
+        """
+        dtype = self.dtypes.get(column_header)
+        if dtype is None:
+            return list(values)
+        return make_column(dtype, values)
+
+    def _convert_row(self, values):
+        """
+        Pad a row with None to the number of columns and convert the values of typed columns to their dtype, so a
+            value which can not be converted raises before any column is changed.
+        :param values: An iterable of values in column order.
+        :return: list
+        """
+        values = list(values)
+        if len(values) > len(self.data):
+            raise ValueError('Row has more values than there are columns.')
+        values.extend([None] * (len(self.data) - len(values)))
+        if self.dtypes:
+            values = [column._convert(value) if isinstance(column, TypedColumn) else value
+                      for column, value in zip(self.data, values)]
+        return values
+
+    def convert(self, column_header, value):
+        """
+        Convert a value to the dtype of a column without writing it.
+        :param column_header: The column header.
+        :param value: The value to convert.
+        :return: The converted value, or value itself for untyped columns.
+        """
+        column = self.data[self.schema.positions[column_header]]
+        return column._convert(value) if isinstance(column, TypedColumn) else value
+
+    def append_row(self, values=()):
+        """
+        Append a row to the end of the store. Missing trailing values are filled with None.
+        :param values: An iterable of values in column order.
+        :return: A VColumnRow view of the new row.
+        """
+        values = self._convert_row(values)
+        for column, value in zip(self.data, values):
+            column.append(value)
+        position = self.size
+        self.size += 1
+        return VColumnRow(self, position)
+
+    def column(self, column_header):
+        """
+        Return the list backing a column. The list is the storage itself, do not resize it.
+        :param column_header: The column header.
+        :return: list or TypedColumn
+        """
+        return self.data[self.schema.positions[column_header]]
+
+    def set_column(self, column_header, values):
+        """
+        Replace every value of a column.
+        :param column_header: The column header.
+        :param values: The new values in position order.
+        :return:
+        """
+        column = self._new_column(column_header, values)
+        if len(column) != self.size:
+            raise ValueError('Expected {} values, got {}.'.format(self.size, len(column)))
+        self.data[self.schema.positions[column_header]] = column
+
+    def fill(self, column_header, value):
+        """
+        Fill a column with a value.
+        :param column_header: The column to fill.
+        :param value: The value to fill the column with.
+        :return:
+        """
+        self.set_column(column_header, [value] * self.size)
+
+    def get(self, position, column_header):
+        return self.data[self.schema.positions[column_header]][position]
+
+    def set(self, position, column_header, value):
+        self.data[self.schema.positions[column_header]][position] = value
+
+    def add_column(self, column_header, position, values, dtype=None):
+        """
+        Add a column before position.
+        :param column_header: The new column header.
+        :param position: The position to insert the column at.
+        :param values: The column's values in position order.
+        :param dtype: The column's dtype, if it should be typed.
+        :return:
+        """
+        schema = self.schema.insert(position, column_header)
+        if dtype is None:
+            column = list(values)
+        else:
+            dtype = dtype_name(dtype)
+            column = make_column(dtype, values)
+        if len(column) != self.size:
+            raise ValueError('Expected {} values, got {}.'.format(self.size, len(column)))
+        if dtype is not None:
+            self.dtypes[column_header] = dtype
+        self.schema = schema
+        self.data.insert(position, column)
+
+    def drop_column(self, column_header):
+        """
+        Remove a column.
+        :param column_header: The column header.
+        :return:
+        """
+        position = self.schema.positions[column_header]
+        self.schema = self.schema.remove(column_header)
+        self.dtypes.pop(column_header, None)
+        del self.data[position]
+
+    def insert_row(self, position, values=()):
+        """
+        Insert a row before position. Missing trailing values are filled with None.
+        The views of the rows after position must have their positions shifted by the caller.
+        :param position: The position to insert the row at.
+        :param values: An iterable of values in column order.
+        :return: A VColumnRow view of the new row.
+        """
+        values = self._convert_row(values)
+        for column, value in zip(self.data, values):
+            column.insert(position, value)
+        self.size += 1
+        return VColumnRow(self, position)
+
+    def delete_row(self, position, row=None):
+        """
+        Delete the row at position.
+        The views of the rows after position must have their positions shifted by the caller.
+        :param position: The position of the row to delete.
+        :param row: The view of the deleted row. It is moved to a store of its own so it keeps its values.
+        :return:
+        """
+        if row is not None:
+            detached = ColumnStore(self.schema, self.dtypes)
+            detached.append_row(self.row_values(position))
+            row._store = detached
+            row._position = 0
+        for column in self.data:
+            del column[position]
+        self.size -= 1
+
+    def load_columns(self, columns):
+        """
+        Replace the contents of the store with whole columns.
+        :param columns: A list with one list or TypedColumn of values per column, all of the same length.
+        :return: A list of VColumnRow views of the rows.
+        """
+        if len(columns) != len(self.data):
+            raise ValueError('Expected {} columns, got {}.'.format(len(self.data), len(columns)))
+        data = []
+        for header, values in zip(self.schema, columns):
+            dtype = self.dtypes.get(header)
+            if isinstance(values, TypedColumn) and values.dtype == dtype:
+                data.append(values)
+            else:
+                data.append(self._new_column(header, values))
+        size = len(data[0]) if data else 0
+        if any(len(column) != size for column in data):
+            raise ValueError('Columns must all have the same length.')
+        self.data = data
+        self.size = size
+        return [VColumnRow(self, position) for position in xrange(size)]
+
+    def reorder(self, order):
+        """
+        Move the rows of the store into a new order.
+        The views of the rows must have their positions updated by the caller.
+        :param order: A list with the current position of every row, in the new order.
+        :return:
+        """
+        if len(order) != self.size:
+            raise ValueError('Expected {} positions, got {}.'.format(self.size, len(order)))
+        data = []
+        for header, column in zip(self.schema, self.data):
+            if isinstance(column, NumpyColumn):
+                data.append(NumpyColumn.from_arrays(column.dtype, column.array[order], column.mask[order]))
+            else:
+                data.append(self._new_column(header, map(column.__getitem__, order)))
+        self.data = data
+
+    def row_values(self, position):
+        """
+        Return the values of a row in column order.
+        :param position: The position of the row in the store.
+        :return: list
+        """
+        return [column[position] for column in self.data]
+
+    def iter_rows(self):
+        """
+        Iterate over the values of every row in position order.
+        :return: An iterator of tuples.
+        """
+        return izip(*self.data) if self.data else iter([])
+
+
+class VColumnRow(VRowBase):
+    """
+    A lightweight view into a single row of a ColumnStore.
+    Behaves like a VRow, but reads and writes go straight to the store's column lists so no per row
+      storage is allocated. The row's index is its position in the store.
+    """
+
+    __slots__ = ('_store', '_position')
+
+    def __init__(self, store, position):
+        """
+        :param store: The ColumnStore holding this row's values.
+        :param position: The position of this row in the store.
+        """
+        self._store = store
+        self._position = position
+
+    @property
+    def index(self):
+        return self._position
+
+    def as_list(self):
+        return self._store.row_values(self._position)
+
+    def as_dict(self):
+        d = dict(zip(self._store.schema.headers, self.as_list()))
+        d.update({'_index': self.index})
+        return d
+
+    @property
+    def header(self):
+        return self._store.data[0][self._position]
+
+    def _set_header(self, header):
+        self._store.data[0][self._position] = header
+
+    def __getitem__(self, item):
+        return self._store.get(self._position, item)
+
+    def __setitem__(self, key, value):
+        self._store.set(self._position, key, value)
+
+    def __getstate__(self):
+        return self._store, self._position
+
+    def __setstate__(self, state):
+        self._store, self._position = state
+
+
+class VColumn(object):
+    """
+    A lazy view of a single column of a VTable.
+    Creating the view reads nothing, values are read from the table in row index order when the view is iterated.
+
+    Usage:
+        >>> column = table.column('A')
+        >>> for value in column.iter_values():
+        >>>     print value
+        >>> print column['1']
+    """
+
+    __slots__ = ('_table', 'header')
+
+    def __init__(self, table, header):
+        """
+        :param table: The VTable the column belongs to.
+        :param header: The column header.
+        """
+        self._table = table
+        self.header = header
+
+    def iter_values(self):
+        """
+        Iterate over the column's values in row index order, without the column header.
+        :return: An iterator of values.
+        """
+        return self._table._iter_column(self.header)
+
+    def as_list(self):
+        """
+        Return the column header followed by the column's values in row index order.
+        :return: list
+        """
+        return [self.header] + list(self.iter_values())
+
+    def __iter__(self):
+        return chain([self.header], self.iter_values())
+
+    def __len__(self):
+        return len(self._table.table_data) + 1
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return str(self.as_list())
+
+    def __getitem__(self, item):
+        return self._table.get_cell_value(self.header, item)
+
+    def __setitem__(self, key, value):
+        self._table.set_cell_value(self.header, key, value)
+
+
+class VTable(object):
+
+    def __init__(self, column_headers, row_headers, columnar=False, dtypes=None):
+        """
+        :type column_headers: list
+        :type row_headers: list
+        :param column_headers: A list of column_headers, copied so the table never changes the caller's list.
+        :param row_headers: A list of row headers, copied like column_headers.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :param dtypes: A dictionary of column header -> dtype ('int', 'float', 'bool' or 'string') declaring
+            typed columns. Typed columns are only supported by columnar storage so this implies columnar=True.
+        """
+        self.column_headers = list(column_headers)
+        self.row_headers = list(row_headers)
+        self.table_data = {}
+        self.schema = VSchema(column_headers)
+        self._store = ColumnStore(self.schema, dtypes) if columnar or dtypes else None
+        # The rows in row index order, self._rows[i].index == i
+        self._rows = []
+        # column header -> secondary index
+        self._indexes = {}
+        for i, row_header in enumerate(self.row_headers):
+            if row_header not in self.table_data:
+                self.table_data[row_header] = self._new_row([row_header], i)
+                self._rows.append(self.table_data[row_header])
+            else:
+                raise ValueError('Row Header "{}" already in table'.format(row_header))
+
+    def _new_row(self, values, index):
+        """
+        Create the row object for a row using this table's storage.
+        :param values: The row's values in column order, the first value being the row header. Missing values
+            are filled with None and extra values are ignored.
+        :param index: The index of the row in the table.
+        :return: VRow
+        """
+        width = min(len(values), len(self.schema))
+        if self._store is not None:
+            return self._store.append_row(values[:width])
+        row = VRow(self.schema, values[0], index)
+        row._values[:width] = values[:width]
+        return row
+
+    def _append_row(self, values):
+        """
+        Add a row to the end of the table.
+        :param values: The row's values in column order, the first value being the row header.
+        :return: The new row.
+        """
+        row_header = values[0]
+        if row_header in self.table_data:
+            raise ValueError('Row Header "{}" already in table'.format(row_header))
+        row = self._new_row(values, len(self._rows))
+        self.table_data[row_header] = row
+        self.row_headers.append(row_header)
+        self._rows.append(row)
+        if self._indexes:
+            try:
+                self._index_row(row)
+            except ValueError:
+                self._remove_row(row_header)
+                raise
+        return row
+
+    def add_column(self, column_header, default=None, position=None, dtype=None):
+        """
+        Add a column to the table with every row set to default.
+        Columnar tables only add one column list, row tables add the value to each row without re-sorting.
+        :param column_header: The new column header.
+        :param default: The value of the new column in every row.
+        :param position: The position to insert the column at, defaults to after the last column. The row header
+            column always stays first so the position must be at least 1.
+        :param dtype: The column's dtype ('int', 'float', 'bool' or 'string'). Only supported by columnar tables.
+        :return:
+        """
+        if column_header in self.schema.positions:
+            raise ValueError('Column Header "{}" already in table'.format(column_header))
+        if position is None:
+            position = len(self.schema)
+        if not 1 <= position <= len(self.schema):
+            raise ValueError('Column position must be between 1 and {}.'.format(len(self.schema)))
+        if self._store is not None:
+            self._store.add_column(column_header, position, [default] * self._store.size, dtype)
+            self.schema = self._store.schema
+        else:
+            if dtype is not None:
+                raise ValueError('Typed columns need columnar storage.')
+            self.schema = self.schema.insert(position, column_header)
+            for row in self._rows:
+                row._schema = self.schema
+                row._values.insert(position, default)
+        self.column_headers.insert(position, column_header)
+
+    def drop_column(self, column_header):
+        """
+        Remove a column from the table.
+        :param column_header: The column header to remove. The row header column can not be removed.
+        :return:
+        """
+        if column_header not in self.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_header))
+        position = self.schema.positions[column_header]
+        if position == 0:
+            raise ValueError('The row header column can not be dropped.')
+        for key in self._indexes_on(column_header):
+            del self._indexes[key]
+        if self._store is not None:
+            self._store.drop_column(column_header)
+            self.schema = self._store.schema
+        else:
+            self.schema = self.schema.remove(column_header)
+            for row in self._rows:
+                row._schema = self.schema
+                del row._values[position]
+        del self.column_headers[position]
+
+    def _row_values(self, row_header, values):
+        """
+        Build the list of values for a new row.
+        :param row_header: The hashable object used as the row header.
+        :param values: A dictionary of column header -> value, or None.
+        :return: list
+        """
+        row_values = [None] * len(self.schema)
+        row_values[0] = row_header
+        if values:
+            positions, _ = self._resolve_cells(values, ())
+            for column_header, value in values.items():
+                row_values[positions[column_header]] = value
+        return row_values
+
+    def _reindex(self, start):
+        """
+        Renumber the rows from start onwards after rows were inserted or deleted.
+        :param start: The index of the first row to renumber.
+        :return:
+        """
+        rows = self._rows
+        if self._store is not None:
+            for i in xrange(start, len(rows)):
+                rows[i]._position = i
+        else:
+            for i in xrange(start, len(rows)):
+                rows[i].index = i
+
+    def append_row(self, row_header, values=None):
+        """
+        Add a row to the end of the table.
+
+        Usage:
+            >>> table.append_row('6', {'A': 'X'})
+        :param row_header: The hashable object used as the row header.
+        :param values: A dictionary of column header -> value for the new row.
+        :return: The new row.
+        """
+        return self._append_row(self._row_values(row_header, values))
+
+    def extend_rows(self, rows):
+        """
+        Add several rows to the end of the table. Row headers are checked before any row is added.
+        :param rows: An iterable of row value sequences in column order, the first value being the row header.
+        :return:
+        """
+        rows = list(rows)
+        row_headers = set()
+        for values in rows:
+            if values[0] in self.table_data or values[0] in row_headers:
+                raise ValueError('Row Header "{}" already in table'.format(values[0]))
+            row_headers.add(values[0])
+        added = []
+        try:
+            for values in rows:
+                self._append_row(values)
+                added.append(values[0])
+        except ValueError:
+            for row_header in reversed(added):
+                self.delete_row(row_header)
+            raise
+
+    def insert_row(self, index, row_header, values=None):
+        """
+        Insert a row before index, shifting the index of every row after it.
+        Appending is amortized O(1), inserting before the last row renumbers the rows after it.
+        :param index: The row index to insert at, negative indexes count from the end like list.insert.
+        :param row_header: The hashable object used as the row header.
+        :param values: A dictionary of column header -> value for the new row.
+        :return: The new row.
+        """
+        size = len(self._rows)
+        if index < 0:
+            index = max(index + size, 0)
+        if index >= size:
+            return self.append_row(row_header, values)
+        if row_header in self.table_data:
+            raise ValueError('Row Header "{}" already in table'.format(row_header))
+        row_values = self._row_values(row_header, values)
+        if self._store is not None:
+            row = self._store.insert_row(index, row_values)
+        else:
+            row = VRow(self.schema, row_header, index)
+            row._values = row_values
+        self._rows.insert(index, row)
+        self.row_headers.insert(index, row_header)
+        self.table_data[row_header] = row
+        self._reindex(index + 1)
+        if self._indexes:
+            try:
+                self._index_row(row)
+            except ValueError:
+                self._remove_row(row_header)
+                raise
+        return row
+
+    def delete_row(self, row_header):
+        """
+        Delete a row, shifting the index of every row after it.
+        Deleting the last row is O(1), deleting any other row renumbers the rows after it.
+        :param row_header: The row header of the row to delete.
+        :return: The deleted row, which keeps its values but no longer belongs to the table.
+        """
+        if row_header not in self.table_data:
+            raise KeyError("'{}' not in row headers.".format(row_header))
+        row = self.table_data[row_header]
+        for index in self._indexes.values():
+            index.remove(row_header, self._index_value(index, row))
+        return self._remove_row(row_header)
+
+    def _remove_row(self, row_header):
+        """
+        Remove a row from the table's storage without touching the secondary indexes.
+        :param row_header: The row header of the row to remove.
+        :return: The removed row.
+        """
+        row = self.table_data.pop(row_header)
+        index = row.index
+        del self._rows[index]
+        del self.row_headers[index]
+        if self._store is not None:
+            self._store.delete_row(index, row)
+        self._reindex(index)
+        return row
 
-    @property
-    def header(self):
+    def _load_columns(self, columns):
         """
-        Return the row header.
+        Fill an empty table from whole columns.
+        :param columns: A list with one list or TypedColumn of values per column in row index order.
         :return:
         """
-        return self.as_list()[0]
+        row_headers = list(columns[0]) if columns else []
+        table_data = {}
+        if self._store is not None:
+            rows = self._store.load_columns(columns)
+        else:
+            rows = []
+            new_row = VRow.__new__
+            for i, values in enumerate(izip(*columns)):
+                row = new_row(VRow)
+                row._schema = self.schema
+                row._values = list(values)
+                row.index = i
+                rows.append(row)
+        for row_header, row in izip(row_headers, rows):
+            if row_header in table_data:
+                raise ValueError('Row Header "{}" already in table'.format(row_header))
+            table_data[row_header] = row
+        self.table_data = table_data
+        self.row_headers.extend(row_headers)
+        self._rows = rows
+        for key in self._indexes:
+            self._build_index(key)
 
-    def _set_header(self, header):
+    @property
+    def columnar(self):
         """
-        Set the row header.
-        :param header: The hashable object to use as this rows header value.
+        Return True if this table's data is kept in a ColumnStore.
         :return:
         """
-        header_key = sorted(self._d.items(), key=lambda x: x[1]['index'])[0][0]
-        self._d[header_key]['value'] = header
-
-    def __iter__(self):
-        return self.as_list().__iter__()
-
-    def __repr__(self):
-        return self.__str__()
-
-    def __str__(self):
-        return str(self.as_list())
-
-    def __getitem__(self, item):
-        return self._d[item]['value']
-
-    def __setitem__(self, key, value):
-        self._d[key]['value'] = value
-
-
-class VTable(object):
+        return self._store is not None
 
-    def __init__(self, column_headers, row_headers):
+    @property
+    def dtypes(self):
         """
-        :type column_headers: list
-        :type row_headers: list
-        :param column_headers: A list of column_headers.
-        :param row_headers: A list of row headers.
+        Return a dictionary of column header -> dtype for every typed column.
+        :return:
         """
-        self.column_headers = column_headers
-        self.row_headers = row_headers
-        self.table_data = {}
-        for i, row_header in enumerate(self.row_headers):
-            if row_header not in self.table_data:
-                self.table_data[row_header] = VRow(column_headers, row_header, i)
-            else:
-                raise ValueError('Row Header "{}" already in table'.format(row_header))
+        if self._store is None:
+            return {}
+        return dict(self._store.dtypes)
 
     @property
     def rows(self):
         """
-        Return all rows in the table.
+        Return all rows in the table in row index order.
         :return:
         """
-        return self.table_data.values()
+        return list(self._rows)
 
     @property
     def columns(self):
         """
-        Return all columns in the table.
+        Return all columns in the table. Use column() or iter_columns() to avoid reading every column.
         :return:
         """
-        l = []
+        return [column.as_list() for column in self.iter_columns()]
+
+    def column(self, column_header):
+        """
+        Get a lazy view of a column by it's column header.
+        :param column_header:
+        :return: VColumn
+        """
+        if column_header not in self.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_header))
+        return VColumn(self, column_header)
+
+    def iter_columns(self):
+        """
+        Iterate over lazy views of every column in column order.
+        :return: An iterator of VColumn.
+        """
         for header in self.column_headers:
-            d = []
-            d.append(header)
-            for row in self.table_data.values():
-                d.append(row[header])
-            l.append(d)
-        return l
+            yield VColumn(self, header)
+
+    def _iter_column(self, column_header):
+        """
+        Iterate over a column's values in row index order.
+        :param column_header:
+        :return: An iterator of values.
+        """
+        if self._store is not None:
+            return iter(self._store.column(column_header))
+        position = self.schema.positions[column_header]
+        return (row._values[position] for row in self._rows)
 
     def get_row(self, row_header):
         """
@@ -163,7 +1063,7 @@ class VTable(object):
         return self.table_data[row_header]
 
     def _key_in_column_headers(self, key):
-        return key in self.column_headers
+        return key in self.schema.positions
 
     def _key_in_row_headers(self, key):
         return key in self.table_data
@@ -175,8 +1075,257 @@ class VTable(object):
         :param value: The value to fill the column with.
         :return:
         """
-        for row in self.table_data.values():
-            row[column_name] = value
+        if self._store is not None:
+            if column_name not in self._store.schema:
+                raise KeyError(column_name)
+            self._write_indexed_column(column_name, lambda: self._store.fill(column_name, value))
+            return
+
+        def fill():
+            for row in self._rows:
+                row[column_name] = value
+        self._write_indexed_column(column_name, fill)
+
+    def _writable_column(self, column_name):
+        """
+        Return the position of a column which may be overwritten as a whole.
+        :param column_name: The column header.
+        :return: int
+        """
+        if column_name not in self.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_name))
+        position = self.schema.positions[column_name]
+        if position == 0:
+            raise AttributeError("Attempted to overwrite row header.")
+        return position
+
+    def _column_values(self, column_name):
+        """
+        Return a column's values in row index order. Columnar tables return their storage list, do not resize it.
+        :param column_name: The column header.
+        :return: list
+        """
+        if column_name not in self.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_name))
+        if self._store is not None:
+            return self._store.column(column_name)
+        position = self.schema.positions[column_name]
+        return [row._values[position] for row in self._rows]
+
+    def _set_column_values(self, column_name, values):
+        """
+        Replace every value of a column.
+        :param column_name: The column header.
+        :param values: The new values in row index order.
+        :return:
+        """
+        position = self._writable_column(column_name)
+        if self._store is not None:
+            self._write_indexed_column(column_name, lambda: self._store.set_column(column_name, values))
+            return
+        rows = self._rows
+        if len(values) != len(rows):
+            raise ValueError('Expected {} values, got {}.'.format(len(rows), len(values)))
+
+        def write():
+            for row, value in izip(rows, values):
+                row._values[position] = value
+        self._write_indexed_column(column_name, write)
+
+    def _numeric_array(self, column_name):
+        """
+        Return a column as a numpy array if numpy is installed and every value in the column is numeric.
+        :param column_name: The column header.
+        :return: numpy.ndarray or None
+        """
+        if numpy is None:
+            return None
+        values = self._column_values(column_name)
+        if isinstance(values, NumpyColumn) and values.dtype != 'bool':
+            return None if values.mask.any() else values.array.copy()
+        if _is_numeric(values):
+            return numpy.array(values)
+        return None
+
+    def apply_column(self, column_name, func, vectorized=False):
+        """
+        Replace every value in a column with the result of calling func on it.
+
+        Usage:
+            >>> table.apply_column('weight', lambda x: x * 2.2)
+        :param column_name: The column to apply func to.
+        :param func: A callable taking a single value.
+        :param vectorized: When numpy is installed and every value in the column is numeric, call func once with
+            the whole column as a numpy array instead of once per value.
+        :return:
+        """
+        self._writable_column(column_name)
+        array = self._numeric_array(column_name) if vectorized else None
+        if array is not None:
+            self._set_column_values(column_name, func(array).tolist())
+        else:
+            self._set_column_values(column_name, [func(x) for x in self._column_values(column_name)])
+
+    def map_column(self, column_name, mapping):
+        """
+        Replace every value in a column found in mapping with its mapped value. Values not in mapping are kept.
+
+        Usage:
+            >>> table.map_column('status', {'WORKING': 'OPEN', 'SHIPPED': 'CLOSED'})
+        :param column_name: The column to map.
+        :param mapping: A dictionary of old value -> new value.
+        :return:
+        """
+        self._writable_column(column_name)
+        get = mapping.get
+        self._set_column_values(column_name, [get(x, x) for x in self._column_values(column_name)])
+
+    def combine_columns(self, target, left, right, op):
+        """
+        Set a column to the result of an operation between two columns for every row.
+        Uses numpy when it is installed and both columns are entirely numeric.
+
+        Usage:
+            >>> table.combine_columns('total_weight', 'units', 'unit_weight', '*')
+        :param target: The column to store the results in.
+        :param left: The column used as the left operand.
+        :param right: The column used as the right operand.
+        :param op: One of '+', '-', '*', '/' or a callable taking two values.
+        :return:
+        """
+        self._writable_column(target)
+        func = OPERATORS[op] if op in OPERATORS else op
+        left_array = self._numeric_array(left) if op in OPERATORS else None
+        right_array = self._numeric_array(right) if left_array is not None else None
+        if right_array is not None and not (op == '/' and (right_array == 0).any()):
+            values = func(left_array, right_array).tolist()
+        else:
+            values = [func(x, y) for x, y in izip(self._column_values(left), self._column_values(right))]
+        self._set_column_values(target, values)
+
+    def _sort_keys(self, keys):
+        """
+        Normalize sort keys to a list of (column header, descending) pairs.
+        :param keys: A list of column headers or (column header, 'asc' or 'desc') pairs.
+        :return: list
+        """
+        sort_keys = []
+        for key in keys:
+            if isinstance(key, tuple) and len(key) == 2 and key[1] in DIRECTIONS:
+                column_header, descending = key[0], key[1] == 'desc'
+            else:
+                column_header, descending = key, False
+            if column_header not in self.schema.positions:
+                raise KeyError("'{}' not in column headers.".format(column_header))
+            sort_keys.append((column_header, descending))
+        if not sort_keys:
+            raise ValueError('At least one sort key is required.')
+        return sort_keys
+
+    def _lexsort_order(self, sort_keys, stable):
+        """
+        Sort the rows with numpy when every sort key is a numeric typed column.
+        :param sort_keys: A list of (column header, descending) pairs.
+        :param stable: Keep the current order of rows with equal keys.
+        :return: A list of row indexes, or None when a key can not be sorted with numpy.
+        """
+        if numpy is None or self._store is None:
+            return None
+        columns = [self._store.column(column_header) for column_header, descending in sort_keys]
+        if not all(isinstance(column, NumpyColumn) for column in columns):
+            return None
+        if len(columns) == 1 and not stable and not columns[0].mask.any():
+            array = columns[0].array
+            return numpy.argsort(-array if sort_keys[0][1] else array, kind='quicksort').tolist()
+        # lexsort sorts by its last array first, the mask of each key ranks missing values last.
+        arrays = []
+        for column, (column_header, descending) in reversed(zip(columns, sort_keys)):
+            array = column.array.astype('int64') if column.dtype == 'bool' else column.array
+            arrays.append(-array if descending else array)
+            arrays.append(column.mask)
+        return numpy.lexsort(arrays).tolist()
+
+    def sort_order(self, keys, stable=True):
+        """
+        Compute the permutation of row indexes which sorts the table, without moving any row.
+        Later keys break ties of earlier ones and None values sort last in either direction. Numeric typed columns
+            are sorted with numpy.lexsort, other columns with one stable sort per key over the column's values.
+
+        Usage:
+            >>> order = table.sort_order(['SKU', ('Units', 'desc')])
+            >>> rows = [table.rows[i] for i in order]
+        :param keys: A list of column headers or (column header, 'asc' or 'desc') pairs.
+        :param stable: Keep the current order of rows with equal keys. Only a single numeric typed column without
+            missing values is sorted differently when False.
+        :return: A list of row indexes in sorted order.
+        """
+        sort_keys = self._sort_keys(keys)
+        order = self._lexsort_order(sort_keys, stable)
+        if order is not None:
+            return order
+        order = range(len(self._rows))
+        for column_header, descending in reversed(sort_keys):
+            values = self._column_values(column_header)
+            if not isinstance(values, list):
+                values = list(values)
+            present = [i for i in order if values[i] is not None]
+            present.sort(key=values.__getitem__, reverse=descending)
+            if len(present) < len(order):
+                present.extend(i for i in order if values[i] is None)
+            order = present
+        return order
+
+    def sort_by(self, keys, stable=True):
+        """
+        Sort the rows of the table in place. Rows keep their identity and only their indexes change, so the row
+            objects, row headers and secondary indexes of the table stay valid.
+
+        Usage:
+            >>> table.sort_by(['SKU', ('Units', 'desc')])
+        :param keys: A list of column headers or (column header, 'asc' or 'desc') pairs.
+        :param stable: Keep the current order of rows with equal keys, see sort_order().
+        :return: The permutation of the old row indexes which was applied.
+        """
+        order = self.sort_order(keys, stable)
+        if self._store is not None:
+            self._store.reorder(order)
+        rows = self._rows
+        self._rows = [rows[i] for i in order]
+        row_headers = self.row_headers
+        self.row_headers = [row_headers[i] for i in order]
+        self._reindex(0)
+        return order
+
+    def aggregate(self, column_name, reductions=AGGREGATES):
+        """
+        Compute several reductions over a column in a single pass without reading any other column.
+        None values are skipped. 'sum' and 'mean', which are part of the default reductions, need numeric values,
+            so text columns raise a ValueError unless they are aggregated with e.g. ['count', 'min', 'max'].
+
+        Usage:
+            >>> table.aggregate('Units', ['sum', 'mean'])
+            >>> # {'sum': 120, 'mean': 12.0}
+        :param column_name: The column to aggregate.
+        :param reductions: An iterable of reduction names from AGGREGATES.
+        :return: A dictionary of reduction name -> value.
+        """
+        if column_name not in self.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_name))
+        aggregator = Aggregator(reductions)
+        try:
+            if self._store is not None:
+                column = self._store.column(column_name)
+                if isinstance(column, NumpyColumn) and column.dtype != 'bool':
+                    aggregator.update_array(column.array[~column.mask])
+                else:
+                    aggregator.update(column)
+            else:
+                position = self.schema.positions[column_name]
+                aggregator.update(row._values[position] for row in self._rows)
+        except TypeError:
+            raise ValueError("Column '{}' holds values which can not be summed, aggregate it with reductions such "
+                             "as ['count', 'min', 'max'].".format(column_name))
+        return aggregator.result()
 
     def export(self, delimiter, include_headers=True, none_replacement='', newline_char='\n'):
         """
@@ -186,15 +1335,47 @@ class VTable(object):
         :param none_replacement: The character to use to replace NoneType objects.
         :return: A human readable format of this table instance.
         """
-        data = ''
+        io = StringIO.StringIO()
+        self.export_to(io, delimiter, include_headers, none_replacement, newline_char)
+        return io.getvalue()
+
+    def iter_export(self, delimiter, include_headers=True, none_replacement=''):
+        """
+        Iterate over the exported lines of the table one at a time in row index order.
+        Lines are yielded without a trailing newline.
+        :param delimiter: The character to use as a delimiter to separate the values of each row.
+        :param include_headers: Yield the table headers as the first line.
+        :param none_replacement: The character to use to replace NoneType objects.
+        :return: A generator of strings.
+        """
+        if include_headers:
+            yield delimiter.join(self.column_headers)
+        if self._store is not None:
+            for values in self._store.iter_rows():
+                yield delimiter.join([_convert(x, none_replacement) for x in values])
+        else:
+            for row in self._rows:
+                yield row.as_text(delimiter, none_replacement)
+
+    def export_to(self, fileobj, delimiter, include_headers=True, none_replacement='', newline_char='\n'):
+        """
+        Write the exported table to a file like object one line at a time instead of building the whole export
+            in memory. The written data is identical to export().
+        :param fileobj: Any object with a write() method.
+        :param delimiter: The character to use as a delimiter to separate the values of each row.
+        :param include_headers: Include the table headers in the exported data.
+        :param none_replacement: The character to use to replace NoneType objects.
+        :param newline_char: The character to separate lines with.
+        :return:
+        """
+        lines = self.iter_export(delimiter, include_headers, none_replacement)
         if include_headers:
-            data += delimiter.join(self.column_headers)
-            data += newline_char
-        text_rows = []
-        for row in sorted(self.table_data.values(), key=lambda x: x.index):
-            text_rows.append(row.as_text(delimiter, none_replacement))
-        data += newline_char.join(text_rows)
-        return data
+            fileobj.write(next(lines))
+            fileobj.write(newline_char)
+        for i, line in enumerate(lines):
+            if i:
+                fileobj.write(newline_char)
+            fileobj.write(line)
 
     def get_cell_value(self, column_header, row_header):
         """
@@ -205,7 +1386,7 @@ class VTable(object):
         :param row_header:
         :return:
         """
-        if column_header not in self.column_headers:
+        if column_header not in self.schema.positions:
             raise KeyError("'{}' not in column headers.".format(column_header))
         if row_header not in self.table_data:
             raise KeyError("'{}' not in row headers.".format(row_header))
@@ -221,71 +1402,626 @@ class VTable(object):
         :param value:
         :return:
         """
-        if column_header not in self.column_headers:
+        if column_header not in self.schema.positions:
             raise KeyError("'{}' not in column headers.".format(column_header))
         if row_header not in self.table_data:
             raise KeyError("'{}' not in row headers.".format(row_header))
         if row_header == self.table_data[row_header][column_header]:
             raise AttributeError("Attempted to overwrite row header.")
-        self.table_data[row_header][column_header] = value
+        if not self._indexes_on(column_header):
+            self.table_data[row_header][column_header] = value
+            return
+
+        def write():
+            self.table_data[row_header][column_header] = value
+        self._write_indexed_cells([(column_header, row_header)], write)
+
+    def _resolve_cells(self, column_headers, row_headers):
+        """
+        Validate a batch of column and row headers once and resolve them for direct writes into storage.
+        :param column_headers: An iterable of the column headers being written to.
+        :param row_headers: An iterable of the row headers being written to.
+        :return: A tuple of a column header -> position dict and a row header -> row dict.
+        """
+        positions = {}
+        for column_header in column_headers:
+            if column_header not in self.schema.positions:
+                raise KeyError("'{}' not in column headers.".format(column_header))
+            positions[column_header] = self.schema.positions[column_header]
+            if positions[column_header] == 0:
+                raise AttributeError("Attempted to overwrite row header.")
+        rows = {}
+        for row_header in row_headers:
+            if row_header not in self.table_data:
+                raise KeyError("'{}' not in row headers.".format(row_header))
+            rows[row_header] = self.table_data[row_header]
+        return positions, rows
+
+    def set_many(self, cells):
+        """
+        Set many cell values at once.
+        Every column and row header is validated and every value of a typed column is converted once before any
+            value is written, so either all of the values are set or none of them are.
+        :param cells: An iterable of (column_header, row_header, value) triples.
+        :return:
+        """
+        cells = list(cells)
+        positions, rows = self._resolve_cells(set(c[0] for c in cells), set(c[1] for c in cells))
+        if self._store is not None and self._store.dtypes:
+            convert = self._store.convert
+            cells = [(column_header, row_header, convert(column_header, value))
+                     for column_header, row_header, value in cells]
+
+        def write():
+            if self._store is not None:
+                data = self._store.data
+                for column_header, row_header, value in cells:
+                    data[positions[column_header]][rows[row_header]._position] = value
+            else:
+                for column_header, row_header, value in cells:
+                    rows[row_header]._values[positions[column_header]] = value
+        self._write_indexed_cells([(c[0], c[1]) for c in cells], write)
+
+    def update(self, mapping):
+        """
+        Set many cell values at once from a nested mapping.
+        Every column and row header is validated and every value of a typed column is converted once before any
+            value is written, so either all of the values are set or none of them are.
+
+        Usage:
+            >>> table.update({'1': {'A': 'X', 'B': 'Y'}, '2': {'A': 'Z'}})
+        :param mapping: A dictionary of {row_header: {column_header: value}}.
+        :return:
+        """
+        column_headers = set()
+        for values in mapping.values():
+            column_headers.update(values)
+        positions, rows = self._resolve_cells(column_headers, mapping)
+        if self._store is not None and self._store.dtypes:
+            convert = self._store.convert
+            mapping = {row_header: {column_header: convert(column_header, value)
+                                    for column_header, value in values.items()}
+                       for row_header, values in mapping.items()}
 
-    def json_serialize(self):
+        def write():
+            if self._store is not None:
+                data = self._store.data
+                for row_header, values in mapping.items():
+                    position = rows[row_header]._position
+                    for column_header, value in values.items():
+                        data[positions[column_header]][position] = value
+            else:
+                for row_header, values in mapping.items():
+                    row_values = rows[row_header]._values
+                    for column_header, value in values.items():
+                        row_values[positions[column_header]] = value
+        self._write_indexed_cells([(c, r) for r, values in mapping.items() for c in values], write)
+
+    def create_index(self, column_header, unique=False, kind='hash'):
+        """
+        Index a column so find() looks rows up by value instead of scanning the table.
+        Pass a tuple of column headers to create a composite index used by find_by().
+        The index is kept up to date by every write made through the table. Values written straight into a row
+            object returned by get_row() or rows are not seen by the index.
+
+        Usage:
+            >>> table.create_index('ASIN')
+            >>> for row in table.find('ASIN', 'B000123'):
+            >>>     print row.header
+            >>> table.create_index('Units', kind='sorted')
+            >>> print table.range('Units', 10, 50)
+            >>> table.create_index(('SKU', 'Box'), unique=True)
+            >>> print table.find_by(SKU='SKU-1', Box=2)
+        :param column_header: The column to index, or a tuple of columns for a composite index.
+        :param unique: Raise ValueError when two rows hold the same value. None values are not checked.
+        :param kind: 'hash' for equality lookups, or 'sorted' to also answer range() and top_k() without
+            scanning the table.
+        :return:
+        """
+        key, columns = self._index_key(column_header)
+        if kind not in INDEX_KINDS:
+            raise ValueError("Unsupported index kind '{}'.".format(kind))
+        index = INDEX_KINDS[kind](key, unique, columns)
+        index.build(self._index_items(index))
+        self._indexes[key] = index
+
+    def drop_index(self, column_header):
+        """
+        Remove the index on a column.
+        :param column_header: The indexed column, or the tuple of columns of a composite index.
+        :return:
+        """
+        key, columns = self._index_key(column_header)
+        if key not in self._indexes:
+            raise KeyError("'{}' is not indexed.".format(key))
+        del self._indexes[key]
+
+    @property
+    def indexes(self):
+        """
+        Return a dictionary of indexed column header, or tuple of column headers for composite indexes -> whether
+            the index is unique.
+        :return:
+        """
+        return {column_header: index.unique for column_header, index in self._indexes.items()}
+
+    def find(self, column_header, value):
+        """
+        Return the rows holding a value in a column, in row index order.
+        Indexed columns and the row header column are looked up in O(1), other columns are scanned.
+        :param column_header: The column to search.
+        :param value: The value to look for.
+        :return: A list of rows.
+        """
+        if column_header not in self.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_header))
+        if column_header in self._indexes:
+            rows = [self.table_data[row_header] for row_header in self._indexes[column_header].get(value)]
+            rows.sort(key=operator.attrgetter('index'))
+            return rows
+        if self.schema.positions[column_header] == 0:
+            return [self.table_data[value]] if value in self.table_data else []
+        return [self._rows[i] for i, x in enumerate(self._iter_column(column_header)) if x == value]
+
+    def range(self, column_header, lo=None, hi=None):
+        """
+        Return the rows with a value between lo and hi (inclusive) in a column, in ascending value order.
+        Uses the column's sorted index when it has one, otherwise the column is scanned and the matches sorted.
+        None values never match.
+        :param column_header: The column to search.
+        :param lo: The lowest value to include, None for no lower bound.
+        :param hi: The highest value to include, None for no upper bound.
+        :return: A list of rows.
+        """
+        if column_header not in self.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_header))
+        index = self._indexes.get(column_header)
+        if isinstance(index, SortedIndex):
+            return [self.table_data[row_header] for row_header in index.range(lo, hi, self._row_index)]
+        matches = [(value, row) for row, value in izip(self._rows, self._iter_column(column_header))
+                   if value is not None and (lo is None or value >= lo) and (hi is None or value <= hi)]
+        matches.sort(key=operator.itemgetter(0))
+        return [row for value, row in matches]
+
+    def top_k(self, column_header, k):
+        """
+        Return the k rows with the largest values in a column, largest first. None values are skipped.
+        Uses the column's sorted index when it has one, otherwise the column is scanned once with a heap.
+        :param column_header: The column to rank by.
+        :param k: The number of rows.
+        :return: A list of rows.
+        """
+        if column_header not in self.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_header))
+        index = self._indexes.get(column_header)
+        if isinstance(index, SortedIndex):
+            return [self.table_data[row_header] for row_header in index.top_k(k, self._row_index)]
+        values = ((value, row) for row, value in izip(self._rows, self._iter_column(column_header))
+                  if value is not None)
+        return [row for value, row in heapq.nlargest(k, values, key=operator.itemgetter(0))]
+
+    def find_by(self, **values):
+        """
+        Return the rows holding a value in each of several columns, in row index order.
+        The row header column is used when it is given, otherwise the index covering the most of the given columns,
+            preferring unique indexes. Rows found through an index are checked against the remaining columns.
+            Without a usable index the columns are scanned.
+
+        Usage:
+            >>> table.create_index(('SKU', 'Box'))
+            >>> rows = table.find_by(SKU='SKU-1', Box=2)
+            >>> rows = table.find_by(**{'Shipment ID': 'FBA123', 'FNSKU': 'X000123'})
+        :param values: Column header -> value keyword arguments.
+        :return: A list of rows.
+        """
+        if not values:
+            raise ValueError('No columns given.')
+        for column_header in values:
+            if column_header not in self.schema.positions:
+                raise KeyError("'{}' not in column headers.".format(column_header))
+        header_column = self.schema.headers[0]
+        best = self._best_index(values)
+        if header_column in values:
+            row_header = values[header_column]
+            candidates = [self.table_data[row_header]] if row_header in self.table_data else []
+            covered = (header_column,)
+        elif best is not None:
+            if len(best.columns) == 1:
+                value = values[best.columns[0]]
+            else:
+                value = tuple(values[column_header] for column_header in best.columns)
+            candidates = [self.table_data[row_header] for row_header in best.get(value)]
+            candidates.sort(key=operator.attrgetter('index'))
+            covered = best.columns
+        else:
+            columns = list(values)
+            expected = tuple(values[column_header] for column_header in columns)
+            found = izip(*[self._iter_column(column_header) for column_header in columns])
+            return [self._rows[i] for i, row_values in enumerate(found) if row_values == expected]
+        remaining = [(c, v) for c, v in values.items() if c not in covered]
+        return [row for row in candidates if all(row[c] == v for c, v in remaining)]
+
+    def _best_index(self, columns):
+        """
+        Return the index covering the most of the given columns, preferring unique indexes.
+        :param columns: A collection of column headers.
+        :return: The index, or None when no index is covered by the columns.
+        """
+        best = None
+        for index in self._indexes.values():
+            if not all(column_header in columns for column_header in index.columns):
+                continue
+            if best is None or (len(index.columns), index.unique) > (len(best.columns), best.unique):
+                best = index
+        return best
+
+    def _row_index(self, row_header):
+        """
+        Return the index of a row. Passed to sorted indexes so rows with equal values come out in row index order,
+            the order a scan finds them in.
+        :param row_header: The row header.
+        :return: int
+        """
+        return self.table_data[row_header].index
+
+    def _index_key(self, column_header):
+        """
+        Resolve the key and columns of an index.
+        :param column_header: A column header, or a list or tuple of column headers for a composite index.
+        :return: A tuple of the index key and the tuple of indexed columns.
+        """
+        if isinstance(column_header, list):
+            column_header = tuple(column_header)
+        if column_header in self.schema.positions:
+            return column_header, (column_header,)
+        if not isinstance(column_header, tuple) or not column_header:
+            raise KeyError("'{}' not in column headers.".format(column_header))
+        for header in column_header:
+            if header not in self.schema.positions:
+                raise KeyError("'{}' not in column headers.".format(header))
+        if len(column_header) == 1:
+            return column_header[0], column_header
+        return column_header, column_header
+
+    def _indexes_on(self, column_header):
+        """
+        Return the keys of the indexes covering a column.
+        :param column_header: The column header.
+        :return: list
+        """
+        return [key for key, index in self._indexes.items() if column_header in index.columns]
+
+    def _index_value(self, index, row):
+        """
+        Return a row's value in an index, a tuple of values for composite indexes.
+        :param index: The index.
+        :param row: The row.
+        :return:
+        """
+        if len(index.columns) == 1:
+            return row[index.columns[0]]
+        return tuple(row[column_header] for column_header in index.columns)
+
+    def _index_items(self, index):
+        """
+        Iterate over (row_header, value) pairs of an index's columns in row index order.
+        :param index: The index.
+        :return: An iterator of tuples.
+        """
+        row_headers = self._iter_column(self.schema.headers[0])
+        if len(index.columns) == 1:
+            return izip(row_headers, self._iter_column(index.columns[0]))
+        return izip(row_headers, izip(*[self._iter_column(column_header) for column_header in index.columns]))
+
+    def _build_index(self, key):
+        """
+        Fill an index from its columns' current values.
+        :param key: The index key.
+        :return:
+        """
+        index = self._indexes[key]
+        index.build(self._index_items(index))
+
+    def _index_row(self, row):
+        """
+        Add a new row to every index. When a unique index rejects the row it is removed from the others again.
+        :param row: The new row.
+        :return:
+        """
+        added = []
+        try:
+            for index in self._indexes.values():
+                value = self._index_value(index, row)
+                index.add(row.header, value)
+                added.append((index, value))
+        except ValueError:
+            for index, value in added:
+                index.remove(row.header, value)
+            raise
+
+    def _write_indexed_cells(self, cells, write):
+        """
+        Make a write to cells and move the written rows to their new values in the indexes. When a unique index
+            rejects a value the old value of every written cell is written back, indexed or not.
+        :param cells: A list of the (column_header, row_header) pairs being written.
+        :param write: A callable making the write.
+        :return:
+        """
+        keys = {}
+        for column_header, row_header in cells:
+            if column_header not in keys:
+                keys[column_header] = self._indexes_on(column_header)
+        if not any(keys.values()):
+            write()
+            return
+        old_cells = {}
+        old_values = {}
+        for cell in cells:
+            if cell in old_cells:
+                continue
+            column_header, row_header = cell
+            row = self.table_data[row_header]
+            old_cells[cell] = row[column_header]
+            for key in keys[column_header]:
+                if (key, row_header) not in old_values:
+                    old_values[key, row_header] = self._index_value(self._indexes[key], row)
+        write()
+        changes = {}
+        for (key, row_header), old in old_values.items():
+            new = self._index_value(self._indexes[key], self.table_data[row_header])
+            changes.setdefault(key, []).append((row_header, old, new))
+        updated = []
+        try:
+            for key, index_changes in changes.items():
+                self._indexes[key].update(index_changes)
+                updated.append(key)
+        except ValueError:
+            for key in updated:
+                self._indexes[key].update([(r, new, old) for r, old, new in changes[key]])
+            for (column_header, row_header), old in old_cells.items():
+                self.table_data[row_header][column_header] = old
+            raise
+
+    def _write_indexed_column(self, column_header, write):
+        """
+        Make a write to a whole column and rebuild the indexes covering it. When a unique index rejects the new
+            values the old values are written back.
+        :param column_header: The column being written.
+        :param write: A callable making the write.
+        :return:
+        """
+        keys = self._indexes_on(column_header)
+        if not keys:
+            write()
+            return
+        old_values = list(self._iter_column(column_header))
+        write()
+        try:
+            for key in keys:
+                self._build_index(key)
+        except ValueError:
+            if self._store is not None:
+                self._store.set_column(column_header, old_values)
+            else:
+                position = self.schema.positions[column_header]
+                for row, value in izip(self._rows, old_values):
+                    row._values[position] = value
+            for key in keys:
+                self._build_index(key)
+            raise
+
+    def json_serialize(self, compact=True):
         """
         Serialize the table to a json format to be reopened with from_serialized_json().
+        The compact format stores the column headers once and every row as a list of values in row index order.
+        :param compact: Use the compact format. Set to False to write the original format with one dictionary per
+            row, which older versions of this library can read.
         :return:
         """
+        if compact:
+            if self._store is not None:
+                rows = list(self._store.iter_rows())
+            else:
+                rows = [row._values for row in self._rows]
+            d = {'column_headers': self.column_headers, 'dtypes': self.dtypes, 'rows': rows}
+            return json.dumps(d)
         table_data = {}
-        for k, v in self.table_data.items():
-            table_data[k] = v.as_dict()
+        for row in self._rows:
+            table_data[row.header] = row.as_dict()
         d = {'table_data': table_data, 'row_headers': self.row_headers, 'column_headers': self.column_headers}
         return json.dumps(d)
 
     @classmethod
-    def from_serialized_json(cls, json_string):
+    def from_serialized_json(cls, json_string, columnar=False):
+        """
+        Load a table serialized with json_serialize(). Both the compact and the original format are supported.
+        :param json_string: The serialized table.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :return: VTable
+        """
         d = json.loads(json_string)
         column_headers = d['column_headers']
-        row_headers = d['row_headers']
+        if 'rows' in d:
+            table = cls(column_headers, [], columnar=columnar, dtypes=d.get('dtypes'))
+            if d['rows']:
+                table._load_columns([list(values) for values in zip(*d['rows'])])
+            return table
         table_data = d['table_data']
-        td = {}
-        for k, v in table_data.items():
-            td[k] = VRow(column_headers, k)
-            for k1, v1 in v.items():
-                if k1 == '_index':
-                    td[k].index = v1
-                    continue
-                td[k][k1] = v1
-        table = cls('', '')
-        table.column_headers = column_headers
-        table.row_headers = row_headers
-        table.table_data = td
+        table = cls(column_headers, [], columnar=columnar)
+        for k, v in sorted(table_data.items(), key=lambda x: x[1]['_index']):
+            values = [v.get(header) for header in column_headers]
+            values[0] = k
+            table._append_row(values)
+        return table
+
+    def dump_binary_to(self, fileobj):
+        """
+        Write a compact binary snapshot of the table to a file like object, to be reopened with load_binary() or
+            read_binary(). Column headers are written once and values are stored column by column.
+        :param fileobj: Any object with a write() method.
+        :return: The number of bytes written.
+        """
+        if self._store is not None:
+            columns = self._store.data
+        elif self._rows:
+            # Transpose every row at once rather than walking the rows once per column.
+            columns = [list(values) for values in zip(*[row._values for row in self._rows])]
+        else:
+            columns = [[] for _ in self.column_headers]
+        return binary.dump(self.column_headers, self.dtypes, columns, fileobj)
+
+    def dump_binary(self):
+        """
+        Return a compact binary snapshot of the table to be reopened with load_binary().
+        :return: str
+        """
+        io = StringIO.StringIO()
+        self.dump_binary_to(io)
+        return io.getvalue()
+
+    @classmethod
+    def load_binary(cls, data, columnar=False):
+        """
+        Load a table from a binary snapshot created with dump_binary(). Typed columns keep their dtypes.
+        :param data: The snapshot as a str.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :return: VTable
+        """
+        meta, columns = binary.load(data)
+        table = cls(meta['column_headers'], [], columnar=columnar, dtypes=meta['dtypes'])
+        table._load_columns(columns)
         return table
 
     @classmethod
-    def from_iterable(cls, iterable):
+    def read_binary(cls, source, columnar=False):
+        """
+        Load a table from a binary snapshot file written with dump_binary_to().
+        :param source: A file path or a file like object.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :return: VTable
+        """
+        fileobj, close = _open_source(source)
+        try:
+            return cls.load_binary(fileobj.read(), columnar=columnar)
+        finally:
+            if close:
+                fileobj.close()
+
+    @classmethod
+    def open_binary(cls, source):
+        """
+        Open a binary snapshot file written with dump_binary_to() as a read-only, memory mapped table.
+        Only the snapshot's meta block is read when the table is opened, values are decoded when they are accessed.
+        :param source: A file path or a file object opened for reading.
+        :return: MappedVTable
+        """
+        return MappedVTable(source)
+
+    @classmethod
+    def from_iterable(cls, iterable, columnar=False, dtypes=None):
         column_headers = iterable.pop(0)
-        row_headers = [x[0] for x in iterable]
-        td = {}
-        for i, row in enumerate(iterable):
-            vr = VRow(column_headers, row[0], i)
-            for header, value in zip(column_headers, row):
-                vr[header] = value
-            td[row[0]] = vr
-        table = cls('', '')
-        table.column_headers = column_headers
-        table.row_headers = row_headers
-        table.table_data = td
+        table = cls(column_headers, [], columnar=columnar, dtypes=dtypes)
+        for row in iterable:
+            table._append_row(row)
+        return table
+
+    @classmethod
+    def from_rows(cls, rows, columnar=False, dtypes=None):
+        """
+        Build a table from any iterable of rows, the first row being the column headers.
+        Rows are consumed one at a time so generators and file readers are never materialized as a list.
+        :param rows: An iterable of row value sequences.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :param dtypes: A dictionary of column header -> dtype declaring typed columns.
+        :return: VTable
+        """
+        rows = iter(rows)
+        try:
+            column_headers = list(next(rows))
+        except StopIteration:
+            raise ValueError('No column headers found.')
+        table = cls(column_headers, [], columnar=columnar, dtypes=dtypes)
+        for row in rows:
+            table._append_row(row)
         return table
 
     @classmethod
-    def load_flat_file(cls, file_contents, delim):
-        lines = [y.split(delim) for y in [x.strip('\r') for x in file_contents.split('\n')]]
-        return cls.from_iterable(lines)
+    def load_flat_file(cls, file_contents, delim, columnar=False, dtypes=None):
+        lines = (x.strip('\r') for x in file_contents.split('\n'))
+        return cls.from_rows((line.split(delim) for line in lines if line), columnar=columnar, dtypes=dtypes)
 
     @classmethod
-    def load_csv(cls, file_contents, delimiter=','):
+    def load_csv(cls, file_contents, delimiter=',', columnar=False, dtypes=None):
         io = StringIO.StringIO(file_contents)
-        lines = list(csv.reader(io, delimiter=delimiter))
-        return cls.from_iterable(lines)
+        rows = (row for row in csv.reader(io, delimiter=delimiter) if row)
+        return cls.from_rows(rows, columnar=columnar, dtypes=dtypes)
+
+    @classmethod
+    def read_flat_file(cls, source, delim, columnar=False, dtypes=None):
+        """
+        Load a delimited flat file from a file path or file object, building the table one line at a time.
+        Empty lines are skipped.
+        :param source: A file path or a file like object.
+        :param delim: The delimiter separating the values of each line.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :param dtypes: A dictionary of column header -> dtype declaring typed columns.
+        :return: VTable
+        """
+        fileobj, close = _open_source(source)
+        try:
+            lines = (line.rstrip('\n').strip('\r') for line in fileobj)
+            return cls.from_rows((line.split(delim) for line in lines if line), columnar=columnar, dtypes=dtypes)
+        finally:
+            if close:
+                fileobj.close()
+
+    @classmethod
+    def read_csv(cls, source, delimiter=',', columnar=False, dtypes=None):
+        """
+        Load a csv file from a file path or file object, building the table one row at a time.
+        Empty rows are skipped.
+        :param source: A file path or a file like object.
+        :param delimiter: The delimiter separating the values of each row.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :param dtypes: A dictionary of column header -> dtype declaring typed columns.
+        :return: VTable
+        """
+        fileobj, close = _open_source(source)
+        try:
+            rows = (row for row in csv.reader(fileobj, delimiter=delimiter) if row)
+            return cls.from_rows(rows, columnar=columnar, dtypes=dtypes)
+        finally:
+            if close:
+                fileobj.close()
+
+    @classmethod
+    def read_flat_file_parallel(cls, path, delim, processes=None, columnar=False, dtypes=None):
+        """
+        Load a large delimited flat file using several processes. The file is split into byte ranges on line
+            boundaries which are parsed in a process pool and joined in file order. Empty lines are skipped.
+        :param path: The file path.
+        :param delim: The delimiter separating the values of each line.
+        :param processes: The number of worker processes, defaults to the number of cpus.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :param dtypes: A dictionary of column header -> dtype declaring typed columns.
+        :return: VTable
+        """
+        return parallel.read_parallel(cls, path, delim, True, processes, columnar, dtypes)
+
+    @classmethod
+    def read_csv_parallel(cls, path, delimiter=',', processes=None, columnar=False, dtypes=None):
+        """
+        Load a large csv file using several processes. The file is split into byte ranges on line boundaries which
+            are parsed in a process pool and joined in file order, so quoted values may not contain newlines.
+            Empty rows are skipped.
+        :param path: The file path.
+        :param delimiter: The delimiter separating the values of each row.
+        :param processes: The number of worker processes, defaults to the number of cpus.
+        :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+        :param dtypes: A dictionary of column header -> dtype declaring typed columns.
+        :return: VTable
+        """
+        return parallel.read_parallel(cls, path, delimiter, False, processes, columnar, dtypes)
 
     def __getitem__(self, item):
         column_header = item[0]
@@ -297,8 +2033,50 @@ class VTable(object):
         row_header = key[1]
         self.set_cell_value(column_header, row_header, value)
 
+    def query(self):
+        """
+        Start a lazy query over the table. See Query.
+
+        Usage:
+            >>> heavy = table.query().where('Weight', '>', 50).select(['SKU', 'Weight']).order_by('Weight').limit(10)
+            >>> for row_header, sku, weight in heavy:
+            >>>     print sku, weight
+        :return: Query
+        """
+        return Query(self)
+
+    def filter(self, expression):
+        """
+        Return the rows matching an expression in row index order. The expression is compiled once and tested
+            against the column values straight from storage instead of through row objects.
+
+        Usage:
+            >>> from vtable import col
+            >>> rows = table.filter((col('Units') > 10) & col('SKU').startswith('B0'))
+        :param expression: An Expression built with col().
+        :return: A list of rows.
+        """
+        return list(self.query().where(expression).rows())
+
+    def group_by(self, column_header):
+        """
+        Group the rows by the value of a column. See GroupBy.
+
+        Usage:
+            >>> totals = table.group_by('SKU').agg({'Units': 'sum', 'Box': 'count'})
+        :param column_header: The column to group the rows by.
+        :return: GroupBy
+        """
+        return GroupBy(self, column_header)
+
     def __iter__(self):
-        return self.table_data.values().__iter__()
+        return self._rows.__iter__()
+
+
+from vtable.mapped import MappedVTable
+from vtable.expressions import col
+from vtable.query import Query
+from vtable.groups import GroupBy
 
 
 def run_test():
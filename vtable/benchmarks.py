@@ -0,0 +1,327 @@
+"""
+Benchmarks comparing the storage layouts used by VTable.
+Run with `python -m vtable.benchmarks`.
+"""
+import sys
+import timeit
+
+from vtable import VSchema, VRow, ColumnStore, VTable, col
+
+
+def deep_sizeof(obj, seen=None):
+    """
+    Return the approximate number of bytes used by an object and everything it references.
+    Objects referenced more than once (shared schemas, interned values) are only counted once.
+    :param obj: The object to measure.
+    :param seen: A set of object ids which have already been counted.
+    :return: int
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += deep_sizeof(k, seen) + deep_sizeof(v, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_sizeof(item, seen)
+    else:
+        if hasattr(obj, '__dict__'):
+            size += deep_sizeof(obj.__dict__, seen)
+        for cls in type(obj).__mro__:
+            for slot in cls.__dict__.get('__slots__', ()):
+                if hasattr(obj, slot):
+                    size += deep_sizeof(getattr(obj, slot), seen)
+    return size
+
+
+class _DictOfDictsRow(object):
+    """
+    The original VRow layout, one dict per cell holding its value and column index. Only used for comparison.
+    """
+
+    def __init__(self, column_headers, row_header, index=0):
+        self._d = {header: dict(value=None, index=i) for i, header in enumerate(column_headers)}
+        self._d[column_headers[0]]['value'] = row_header
+        self.index = index
+
+
+def bench_row_memory(rows=10000, columns=40):
+    """
+    Compare the memory used by the dict-of-dicts row layout, the slotted VRow and the ColumnStore.
+    :param rows: The number of rows to build.
+    :param columns: The number of columns per row.
+    :return: A dictionary of layout name -> bytes per row.
+    """
+    column_headers = ['row_headers'] + ['col_{}'.format(i) for i in range(columns - 1)]
+    row_headers = [str(i) for i in range(rows)]
+
+    # Headers are shared by every layout so exclude them from the measurements.
+    seen = set()
+    deep_sizeof(column_headers, seen)
+    deep_sizeof(row_headers, seen)
+
+    legacy = [_DictOfDictsRow(column_headers, h, i) for i, h in enumerate(row_headers)]
+    schema = VSchema(column_headers)
+    slotted = [VRow(schema, h, i) for i, h in enumerate(row_headers)]
+    store = ColumnStore(schema)
+    views = [store.append_row([h]) for h in row_headers]
+
+    results = {
+        'dict_of_dicts': deep_sizeof(legacy, set(seen)) / float(rows),
+        'slotted_vrow': deep_sizeof(slotted, set(seen)) / float(rows),
+        'column_store': deep_sizeof(views, set(seen)) / float(rows),
+    }
+    return results
+
+
+def bench_cell_access(columns=300, number=100000):
+    """
+    Compare checking a column header against the ordered header list with checking it against the table's
+        schema, and time get_cell_value on the last column of a wide table.
+    :param columns: The number of columns in the table.
+    :param number: The number of lookups to time.
+    :return: A dictionary of benchmark name -> microseconds per lookup.
+    """
+    column_headers = ['row_headers'] + ['col_{}'.format(i) for i in range(columns - 1)]
+    table = VTable(column_headers, ['1'])
+    last = column_headers[-1]
+    results = {
+        'list_membership': timeit.timeit(lambda: last in table.column_headers, number=number),
+        'schema_membership': timeit.timeit(lambda: last in table.schema.positions, number=number),
+        'get_cell_value': timeit.timeit(lambda: table.get_cell_value(last, '1'), number=number),
+    }
+    return {k: v / number * 1e6 for k, v in results.items()}
+
+
+def _packing_list(rows, columns):
+    """
+    Build a table shaped like a packing list, half text columns and half integer columns.
+    :param rows: The number of rows.
+    :param columns: The number of columns, including the row header column.
+    :return: VTable
+    """
+    column_headers = ['row_headers'] + ['col_{}'.format(i) for i in range(columns - 1)]
+    data = [column_headers]
+    for i in range(rows):
+        data.append([str(i)] + [('SKU-{}'.format(i * j) if j % 2 else i * j) for j in range(1, columns)])
+    return VTable.from_iterable(data)
+
+
+def bench_serialization(rows=20000, columns=20, number=3):
+    """
+    Compare the size and round trip time of the json and binary snapshot formats.
+    :param rows: The number of rows in the table.
+    :param columns: The number of columns in the table.
+    :param number: The number of round trips to time.
+    :return: A dictionary of format name -> (bytes, seconds per round trip).
+    """
+    table = _packing_list(rows, columns)
+    round_trips = {
+        'json': lambda: VTable.from_serialized_json(table.json_serialize(compact=False)),
+        'json_compact': lambda: VTable.from_serialized_json(table.json_serialize()),
+        'binary': lambda: VTable.load_binary(table.dump_binary()),
+    }
+    sizes = {
+        'json': len(table.json_serialize(compact=False)),
+        'json_compact': len(table.json_serialize()),
+        'binary': len(table.dump_binary()),
+    }
+    return {name: (sizes[name], timeit.timeit(func, number=number) / number) for name, func in round_trips.items()}
+
+
+def bench_lookup(rows=20000, columns=20, number=100):
+    """
+    Compare finding the rows holding a value by scanning a column with looking it up in a hash index.
+    :param rows: The number of rows in the table.
+    :param columns: The number of columns in the table.
+    :param number: The number of lookups to time.
+    :return: A dictionary of benchmark name -> microseconds per lookup.
+    """
+    table = _packing_list(rows, columns)
+    value = table['col_0', str(rows - 1)]
+    results = {'scan': timeit.timeit(lambda: table.find('col_0', value), number=number)}
+    table.create_index('col_0')
+    results['hash_index'] = timeit.timeit(lambda: table.find('col_0', value), number=number)
+    return {k: v / number * 1e6 for k, v in results.items()}
+
+
+def bench_range(rows=20000, columns=20, number=20):
+    """
+    Compare range() and top_k() answered by scanning a column with answering them from a sorted index.
+    :param rows: The number of rows in the table.
+    :param columns: The number of columns in the table.
+    :param number: The number of queries to time.
+    :return: A dictionary of benchmark name -> microseconds per query.
+    """
+    table = _packing_list(rows, columns)
+    lo, hi = rows, rows + 100
+    queries = {
+        'range': lambda: table.range('col_1', lo, hi),
+        'top_k': lambda: table.top_k('col_1', 100),
+    }
+    results = {}
+    for name, query in queries.items():
+        results[name + '_scan'] = timeit.timeit(query, number=number)
+    table.create_index('col_1', kind='sorted')
+    for name, query in queries.items():
+        results[name + '_sorted_index'] = timeit.timeit(query, number=number)
+    return {k: v / number * 1e6 for k, v in results.items()}
+
+
+def bench_query(rows=20000, columns=20, number=10):
+    """
+    Compare filtering and sorting with a python loop over the rows with the same query run by Query.
+    :param rows: The number of rows in the table.
+    :param columns: The number of columns in the table.
+    :param number: The number of queries to time.
+    :return: A dictionary of benchmark name -> milliseconds per query.
+    """
+    table = _packing_list(rows, columns)
+
+    def loop():
+        matches = [row for row in table.rows if row['col_1'] > rows // 2 and row['col_3'] % 3 == 0]
+        matches.sort(key=lambda row: row['col_1'], reverse=True)
+        return [(row.header, row['col_0'], row['col_1']) for row in matches[:100]]
+
+    query = table.query().where('col_1', '>', rows // 2).where(lambda row: row['col_3'] % 3 == 0)
+    query = query.select(['col_0', 'col_1']).order_by('col_1', descending=True).limit(100)
+    results = {
+        'row_loop': timeit.timeit(loop, number=number),
+        'query': timeit.timeit(lambda: list(query), number=number),
+    }
+    table.create_index('col_1', kind='sorted')
+    results['query_sorted_index'] = timeit.timeit(lambda: list(query), number=number)
+    return {k: v / number * 1e3 for k, v in results.items()}
+
+
+def bench_filter(rows=1000000, number=3):
+    """
+    Compare filtering with a lambda over the rows with filtering with a compiled expression.
+    :param rows: The number of rows in the table.
+    :param number: The number of filters to time.
+    :return: A dictionary of benchmark name -> seconds per filter.
+    """
+    columns = [
+        [str(i) for i in xrange(rows)],
+        [('B0{}' if i % 3 else 'X0{}').format(i) for i in xrange(rows)],
+        [i % 50 for i in xrange(rows)],
+    ]
+    results = {}
+    for columnar in (False, True):
+        table = VTable(['row_headers', 'sku', 'qty'], [], columnar=columnar)
+        table._load_columns(columns)
+        storage = 'columnar' if columnar else 'rows'
+        predicate = lambda row: row['qty'] > 10 and row['sku'].startswith('B0')
+        expression = (col('qty') > 10) & col('sku').startswith('B0')
+        results['lambda_' + storage] = timeit.timeit(lambda: [row for row in table.rows if predicate(row)],
+                                                     number=number) / number
+        results['expression_' + storage] = timeit.timeit(lambda: table.filter(expression), number=number) / number
+    return results
+
+
+def bench_sort(rows=200000, number=3):
+    """
+    Compare sorting the rows with a key function against sort_order() on plain and typed columns.
+    :param rows: The number of rows in the table.
+    :param number: The number of sorts to time.
+    :return: A dictionary of benchmark name -> seconds per sort.
+    """
+    columns = [
+        [str(i) for i in xrange(rows)],
+        [(i * 7919) % 1000 for i in xrange(rows)],
+        [(i * 104729) % 997 / 10.0 for i in xrange(rows)],
+    ]
+    keys = ['qty', ('weight', 'desc')]
+    results = {}
+    for name, dtypes in (('sort_order', None), ('sort_order_typed', {'qty': 'int', 'weight': 'float'})):
+        table = VTable(['row_headers', 'qty', 'weight'], [], columnar=True, dtypes=dtypes)
+        table._load_columns(columns)
+        results[name] = timeit.timeit(lambda: table.sort_order(keys), number=number) / number
+    results['key_function'] = timeit.timeit(
+        lambda: sorted(table.rows, key=lambda row: (row['qty'], -row['weight'])), number=number) / number
+    return results
+
+
+def bench_group_by(rows=1000000, groups=1000, number=3):
+    """
+    Compare totalling a column per group with a loop over the rows against group_by().agg().
+    :param rows: The number of rows in the table.
+    :param groups: The number of distinct group values.
+    :param number: The number of aggregations to time.
+    :return: A dictionary of benchmark name -> seconds per aggregation.
+    """
+    columns = [
+        [str(i) for i in xrange(rows)],
+        ['B0{}'.format(i % groups) for i in xrange(rows)],
+        [i % 50 for i in xrange(rows)],
+    ]
+    results = {}
+    for columnar in (False, True):
+        table = VTable(['row_headers', 'sku', 'qty'], [], columnar=columnar)
+        table._load_columns(columns)
+        storage = 'columnar' if columnar else 'rows'
+
+        def row_loop():
+            totals = {}
+            for row in table.rows:
+                totals[row['sku']] = totals.get(row['sku'], 0) + row['qty']
+            return totals
+        results['row_loop_' + storage] = timeit.timeit(row_loop, number=number) / number
+        results['group_by_' + storage] = timeit.timeit(
+            lambda: table.group_by('sku').agg({'qty': 'sum'}), number=number) / number
+    return results
+
+
+def run_benchmarks():
+    print 'Row memory (bytes per row, 10000 rows x 40 columns)'
+    results = bench_row_memory()
+    for name in ('dict_of_dicts', 'slotted_vrow', 'column_store'):
+        print '  {:<20}{:>12.1f}'.format(name, results[name])
+
+    print 'Cell access (microseconds per lookup, 300 columns)'
+    results = bench_cell_access()
+    for name in ('list_membership', 'schema_membership', 'get_cell_value'):
+        print '  {:<20}{:>12.3f}'.format(name, results[name])
+
+    print 'Serialization round trip (bytes, seconds, 20000 rows x 20 columns)'
+    results = bench_serialization()
+    for name in ('json', 'json_compact', 'binary'):
+        print '  {:<20}{:>12}{:>12.3f}'.format(name, *results[name])
+
+    print 'Find by value (microseconds per lookup, 20000 rows x 20 columns)'
+    results = bench_lookup()
+    for name in ('scan', 'hash_index'):
+        print '  {:<20}{:>12.3f}'.format(name, results[name])
+
+    print 'Range queries (microseconds per query, 20000 rows x 20 columns)'
+    results = bench_range()
+    for name in ('range_scan', 'range_sorted_index', 'top_k_scan', 'top_k_sorted_index'):
+        print '  {:<20}{:>12.3f}'.format(name, results[name])
+
+    print 'Filter, sort and limit (milliseconds per query, 20000 rows x 20 columns)'
+    results = bench_query()
+    for name in ('row_loop', 'query', 'query_sorted_index'):
+        print '  {:<20}{:>12.3f}'.format(name, results[name])
+
+    print 'Filter (seconds per filter, 1000000 rows)'
+    results = bench_filter()
+    for name in ('lambda_rows', 'expression_rows', 'lambda_columnar', 'expression_columnar'):
+        print '  {:<20}{:>12.3f}'.format(name, results[name])
+
+    print 'Sort by two columns (seconds per sort, 200000 rows)'
+    results = bench_sort()
+    for name in ('key_function', 'sort_order', 'sort_order_typed'):
+        print '  {:<20}{:>12.3f}'.format(name, results[name])
+
+    print 'Sum per group (seconds per aggregation, 1000000 rows, 1000 groups)'
+    results = bench_group_by()
+    for name in ('row_loop_rows', 'group_by_rows', 'row_loop_columnar', 'group_by_columnar'):
+        print '  {:<20}{:>12.3f}'.format(name, results[name])
+
+
+if __name__ == '__main__':
+    run_benchmarks()
@@ -0,0 +1,364 @@
+"""
+A compact column-major binary snapshot format for VTable.
+
+Layout, all integers are little endian and every block starts on an 8 byte boundary:
+    magic       4 bytes 'VTB1' followed by 4 bytes of padding
+    blocks      one block per column, in column order
+    lookup      when the row headers can be sorted, the row headers in sorted order and an int block of their row
+                  positions
+    meta        a marshal dump of {'version', 'column_headers', 'dtypes', 'size', 'blocks', 'lookup'} where blocks
+                  is a list of (kind, offset, length, layout) tuples with offsets counted from the start of the file
+                  and lookup is a pair of the same tuples for the two lookup blocks, or None
+    trailer     u64 meta offset, u64 meta length and the 4 byte magic again
+
+The layout of a block is a dictionary of:
+    format      the struct format character of the block's values, or of its offsets for string blocks
+    masked      True when the block has a mask, one byte per value which is 1 for None. Columns without a missing
+                  value are written without a mask.
+    separated   True when the values of a string block are joined with NUL bytes
+
+Block layouts for a column of n values:
+    int         n values of the narrowest of int8, int16, int32 and int64 holding every value, mask
+    float       n float64 values, mask
+    bool        n bool bytes, mask
+    bytes       separated: a uint64 payload offset for every 64th value and one for the end of the payload, mask,
+                  padding, the raw str values joined with NUL bytes. Split in one call on decode.
+                otherwise, when a value holds a NUL byte: n + 1 uint32 offsets into the payload, uint64 when the
+                  payload is 4GB or more, mask, padding, the raw str values
+    text        same as bytes with the unicode values encoded as utf-8
+    object      same as bytes with each value encoded with marshal, never separated
+
+The lookup blocks let a memory mapped table find a row header with a binary search over the mapping instead of
+  reading every row header into a dictionary. It is written when the row headers are all str, all unicode or all
+  numbers, the types whose order survives a round trip.
+
+The meta block is written last so a table can be streamed to a file or socket one column at a time. marshal is
+  used for the meta block and object values so snapshots should be read back by the same python version.
+"""
+import marshal
+import struct
+from itertools import imap, izip_longest
+
+from vtable.columns import NumpyColumn, NUMPY_DTYPES, numpy
+
+MAGIC = 'VTB1'
+VERSION = 2
+
+_TRAILER = struct.Struct('<QQ4s')
+_INT64_MIN = -(1 << 63)
+_INT64_MAX = (1 << 63) - 1
+
+# The number of values between two payload offsets of a separated string block.
+CHECKPOINT = 64
+
+# kind -> struct format character of fixed width blocks, ints are narrowed per block
+_FIXED_FORMATS = {
+    'int': 'q',
+    'float': 'd',
+    'bool': '?',
+}
+
+# The integer formats tried for int blocks, narrowest first, with the bound of their magnitude.
+_INT_FORMATS = (('b', 1 << 7), ('h', 1 << 15), ('i', 1 << 31), ('q', 1 << 63))
+
+# struct format character -> numpy dtype
+_NUMPY_FORMATS = {
+    'b': '<i1',
+    'h': '<i2',
+    'i': '<i4',
+    'q': '<i8',
+    'd': '<f8',
+    '?': '?',
+}
+
+
+# value type -> block kind of columns holding a single type of value
+_TYPE_KINDS = {
+    bool: 'bool',
+    int: 'int',
+    long: 'int',
+    float: 'float',
+    str: 'bytes',
+    unicode: 'text',
+}
+
+
+def _padding(size):
+    return '\0' * (-size % 8)
+
+
+def column_kind(values, types=None):
+    """
+    Return the block kind used to store a column's values.
+    :param values: A list of values.
+    :param types: The set of the types of the values, if it is already known.
+    :return: str
+    """
+    types = set(imap(type, values)) if types is None else set(types)
+    types.discard(type(None))
+    kinds = set(_TYPE_KINDS.get(value_type, 'object') for value_type in types)
+    if not kinds:
+        return 'bytes'
+    if len(kinds) > 1:
+        return 'object'
+    kind = kinds.pop()
+    if kind == 'int' and long in types:
+        numbers = [value for value in values if value is not None]
+        if min(numbers) < _INT64_MIN or max(numbers) > _INT64_MAX:
+            return 'object'
+    return kind
+
+
+def _int_format(low, high):
+    """
+    Return the narrowest integer format holding every value between low and high.
+    """
+    for value_format, bound in _INT_FORMATS:
+        if -bound <= low and high < bound:
+            return value_format
+    return 'q'
+
+
+def _width(value_format):
+    return struct.calcsize('<' + value_format)
+
+
+def _encode_fixed(values, kind, masked):
+    """
+    Encode the values of an int, float or bool column.
+    :return: A tuple of the block's layout and bytes.
+    """
+    if isinstance(values, NumpyColumn):
+        array = values.array
+        value_format = _FIXED_FORMATS[kind]
+        if kind == 'int' and len(array):
+            value_format = _int_format(array.min().item(), array.max().item())
+        block = array.astype(_NUMPY_FORMATS[value_format]).tobytes()
+        if masked:
+            block += values.mask.astype('u1').tobytes()
+    else:
+        if masked:
+            mask = bytearray([value is None for value in values])
+            values = [0 if value is None else value for value in values]
+        value_format = _FIXED_FORMATS[kind]
+        if kind == 'int' and values:
+            value_format = _int_format(min(values), max(values))
+        block = struct.pack('<{}{}'.format(len(values), value_format), *values)
+        if masked:
+            block += str(mask)
+    return {'format': value_format, 'masked': masked}, block + _padding(len(block))
+
+
+def _encode_strings(values, kind, masked):
+    """
+    Encode the values of a bytes, text or object column.
+    :return: A tuple of the block's layout and bytes.
+    """
+    if kind == 'text':
+        items = ['' if value is None else value.encode('utf-8') for value in values]
+    elif kind == 'object':
+        items = ['' if value is None else marshal.dumps(value) for value in values]
+    elif masked:
+        items = ['' if value is None else value for value in values]
+    else:
+        items = list(values)
+    mask = str(bytearray([value is None for value in values])) if masked else ''
+    payload = '\0'.join(items)
+    if kind != 'object' and payload.count('\0') == max(len(items) - 1, 0):
+        lengths = map(len, items)
+        checkpoints = []
+        position = 0
+        for start in xrange(0, len(lengths), CHECKPOINT):
+            checkpoints.append(position)
+            chunk = lengths[start:start + CHECKPOINT]
+            position += sum(chunk) + len(chunk)
+        checkpoints.append(position)
+        head = struct.pack('<{}Q'.format(len(checkpoints)), *checkpoints) + mask
+        layout = {'format': 'Q', 'masked': masked, 'separated': True}
+    else:
+        payload = ''.join(items)
+        offsets = [0]
+        total = 0
+        for length in map(len, items):
+            total += length
+            offsets.append(total)
+        offset_format = 'I' if total < 1 << 32 else 'Q'
+        head = struct.pack('<{}{}'.format(len(offsets), offset_format), *offsets) + mask
+        layout = {'format': offset_format, 'masked': masked, 'separated': False}
+    return layout, head + _padding(len(head)) + payload + _padding(len(payload))
+
+
+def encode_column(values):
+    """
+    Encode a column's values into a block.
+    :param values: A list or TypedColumn of values in row index order.
+    :return: A tuple of the block kind, the block's layout and the block's bytes.
+    """
+    if isinstance(values, NumpyColumn):
+        kind, masked = values.dtype, bool(values.mask.any())
+    else:
+        # The types of the values tell both the kind and whether a mask is needed in a single pass.
+        types = set(imap(type, values))
+        kind, masked = column_kind(values, types), type(None) in types
+    if kind in _FIXED_FORMATS:
+        layout, block = _encode_fixed(values, kind, masked)
+    else:
+        layout, block = _encode_strings(values, kind, masked)
+    return kind, layout, block
+
+
+def _mask(buf, offset, size):
+    return bytearray(buf[offset:offset + size])
+
+
+def decode_range(buf, kind, layout, offset, size, start, stop):
+    """
+    Decode a range of values from a block without reading the rest of the block.
+    :param buf: The snapshot as a str, buffer or mmap.
+    :param kind: The block kind.
+    :param layout: The block's layout dictionary.
+    :param offset: The offset of the block in buf.
+    :param size: The number of values in the column.
+    :param start: The position of the first value to decode.
+    :param stop: The position after the last value to decode.
+    :return: list
+    """
+    count = stop - start
+    if count <= 0:
+        return []
+    value_format = layout['format']
+    width = _width(value_format)
+    if kind in _FIXED_FORMATS:
+        values = list(struct.unpack_from('<{}{}'.format(count, value_format), buf, offset + width * start))
+        mask = _mask(buf, offset + width * size + start, count) if layout['masked'] else ()
+        if 1 in mask:
+            values = [None if missing else value for value, missing in zip(values, mask)]
+        return values
+    separated = layout.get('separated')
+    if separated:
+        first = start // CHECKPOINT
+        last = (stop + CHECKPOINT - 1) // CHECKPOINT
+        begin = struct.unpack_from('<Q', buf, offset + 8 * first)[0]
+        end = struct.unpack_from('<Q', buf, offset + 8 * last)[0] - 1
+        mask_offset = offset + 8 * ((size + CHECKPOINT - 1) // CHECKPOINT + 1)
+    else:
+        offsets = struct.unpack_from('<{}{}'.format(count + 1, value_format), buf, offset + width * start)
+        mask_offset = offset + width * (size + 1)
+    mask = _mask(buf, mask_offset + start, count) if layout['masked'] else ()
+    payload_offset = mask_offset + size if layout['masked'] else mask_offset
+    payload_offset += -payload_offset % 8
+    if separated:
+        payload = buf[payload_offset + begin:payload_offset + end]
+        if kind == 'text':
+            payload = payload.decode('utf-8')
+        skip = start - first * CHECKPOINT
+        values = payload.split('\0')[skip:skip + count]
+    else:
+        base = offsets[0]
+        payload = buf[payload_offset + base:payload_offset + offsets[-1]]
+        values = [payload[offsets[i] - base:offsets[i + 1] - base] for i in xrange(count)]
+        if kind == 'text':
+            values = [value.decode('utf-8') for value in values]
+        elif kind == 'object':
+            values = [None if missing else marshal.loads(value) for value, missing in izip_longest(values, mask)]
+    if 1 in mask:
+        values = [None if missing else value for value, missing in zip(values, mask)]
+    return values
+
+
+def decode_column(buf, kind, layout, offset, size, dtype=None):
+    """
+    Decode a block back into a column.
+    :param buf: The snapshot as a str, buffer or mmap.
+    :param kind: The block kind.
+    :param layout: The block's layout dictionary.
+    :param offset: The offset of the block in buf.
+    :param size: The number of values in the column.
+    :param dtype: The dtype the column was declared with, if any.
+    :return: A list of values, or a NumpyColumn for numpy backed dtypes.
+    """
+    if numpy is not None and dtype == kind and dtype in NUMPY_DTYPES:
+        value_format = layout['format']
+        array = numpy.frombuffer(buf, dtype=_NUMPY_FORMATS[value_format], count=size, offset=offset)
+        if layout['masked']:
+            mask = numpy.frombuffer(buf, dtype='u1', count=size, offset=offset + _width(value_format) * size)
+        else:
+            mask = numpy.zeros(size, dtype=bool)
+        return NumpyColumn.from_arrays(dtype, array, mask)
+    return decode_range(buf, kind, layout, offset, size, 0, size)
+
+
+def dump(column_headers, dtypes, columns, fileobj):
+    """
+    Write a snapshot to a file like object one column at a time.
+    :param column_headers: The table's column headers.
+    :param dtypes: A dictionary of column header -> dtype.
+    :param columns: An iterable of column values in column order.
+    :param fileobj: Any object with a write() method.
+    :return: The number of bytes written.
+    """
+    fileobj.write(MAGIC + _padding(len(MAGIC)))
+    position = 8
+    blocks = []
+    size = 0
+    row_headers = None
+    for values in columns:
+        size = len(values)
+        kind, layout, block = encode_column(values)
+        if row_headers is None:
+            row_headers = values
+        blocks.append((kind, position, len(block), layout))
+        fileobj.write(block)
+        position += len(block)
+    lookup = None
+    if blocks and blocks[0][0] != 'object' and not blocks[0][3]['masked']:
+        row_headers = row_headers if isinstance(row_headers, list) else list(row_headers)
+        order = sorted(xrange(size), key=row_headers.__getitem__)
+        lookup = []
+        for values in (map(row_headers.__getitem__, order), order):
+            kind, layout, block = encode_column(values)
+            lookup.append((kind, position, len(block), layout))
+            fileobj.write(block)
+            position += len(block)
+        lookup = tuple(lookup)
+    meta = marshal.dumps({
+        'version': VERSION,
+        'column_headers': list(column_headers),
+        'dtypes': dict(dtypes),
+        'size': size,
+        'blocks': blocks,
+        'lookup': lookup,
+    })
+    fileobj.write(meta)
+    fileobj.write(_TRAILER.pack(position, len(meta), MAGIC))
+    return position + len(meta) + _TRAILER.size
+
+
+def read_meta(buf):
+    """
+    Read and validate the meta block of a snapshot.
+    :param buf: The snapshot as a str, buffer or mmap.
+    :return: dict
+    """
+    if len(buf) < 8 + _TRAILER.size or buf[:len(MAGIC)] != MAGIC:
+        raise ValueError('Not a VTable binary snapshot.')
+    meta_offset, meta_size, magic = _TRAILER.unpack_from(buf, len(buf) - _TRAILER.size)
+    if magic != MAGIC:
+        raise ValueError('Not a VTable binary snapshot.')
+    meta = marshal.loads(buf[meta_offset:meta_offset + meta_size])
+    if meta.get('version') != VERSION:
+        raise ValueError('Unsupported VTable binary snapshot version {}.'.format(meta.get('version')))
+    return meta
+
+
+def load(buf):
+    """
+    Decode every column of a snapshot.
+    :param buf: The snapshot as a str, buffer or mmap.
+    :return: A tuple of the meta dictionary and the list of decoded columns.
+    """
+    meta = read_meta(buf)
+    columns = []
+    for header, (kind, offset, length, layout) in zip(meta['column_headers'], meta['blocks']):
+        columns.append(decode_column(buf, kind, layout, offset, meta['size'], meta['dtypes'].get(header)))
+    return meta, columns
@@ -0,0 +1,290 @@
+"""
+Typed column storage used by ColumnStore for columns declared with a dtype.
+Typed columns behave like a list of values where None marks a missing value. Values are converted to the column's
+  dtype when they are written. When numpy is installed int, float and bool columns are kept in a numpy array with
+  a boolean mask standing in for None.
+"""
+from itertools import izip
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+# The number of values converted to python objects at a time when iterating over a numpy column.
+CHUNK_SIZE = 4096
+
+_TRUE_STRINGS = frozenset(['1', 'true', 't', 'yes', 'y'])
+_FALSE_STRINGS = frozenset(['0', 'false', 'f', 'no', 'n'])
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, basestring) and value == '')
+
+
+def _to_int(value):
+    if _is_missing(value):
+        return None
+    return int(value)
+
+
+def _to_float(value):
+    if _is_missing(value):
+        return None
+    return float(value)
+
+
+def _to_bool(value):
+    if _is_missing(value):
+        return None
+    if isinstance(value, basestring):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+        raise ValueError("Can not convert '{}' to bool.".format(value))
+    return bool(value)
+
+
+def _to_string(value):
+    if value is None:
+        return None
+    if isinstance(value, basestring):
+        return value
+    return str(value)
+
+
+CONVERTERS = {
+    'int': _to_int,
+    'float': _to_float,
+    'bool': _to_bool,
+    'string': _to_string,
+}
+
+NUMPY_DTYPES = {
+    'int': 'int64',
+    'float': 'float64',
+    'bool': 'bool',
+}
+
+_TYPE_NAMES = {
+    int: 'int',
+    long: 'int',
+    float: 'float',
+    bool: 'bool',
+    str: 'string',
+    unicode: 'string',
+}
+
+
+def dtype_name(dtype):
+    """
+    Normalize a dtype given as a name ('int', 'float', 'bool', 'string') or a python type to its name.
+    :param dtype: The dtype name or python type.
+    :return: str
+    """
+    dtype = _TYPE_NAMES.get(dtype, dtype)
+    if dtype not in CONVERTERS:
+        raise ValueError("Unsupported dtype '{}'.".format(dtype))
+    return dtype
+
+
+def make_column(dtype, values=()):
+    """
+    Create the storage for a typed column, backed by numpy when it is installed and the dtype allows it.
+    :param dtype: The dtype name or python type.
+    :param values: The initial values of the column.
+    :return: TypedColumn
+    """
+    dtype = dtype_name(dtype)
+    if numpy is not None and dtype in NUMPY_DTYPES:
+        return NumpyColumn(dtype, values)
+    return TypedColumn(dtype, values)
+
+
+class TypedColumn(object):
+    """
+    A list of values converted to a dtype on write. Used for string columns and when numpy is not installed.
+    """
+
+    def __init__(self, dtype, values=()):
+        """
+        :param dtype: The dtype name.
+        :param values: The initial values of the column.
+        """
+        self.dtype = dtype
+        self._convert = CONVERTERS[dtype]
+        self._data = [self._convert(x) for x in values]
+
+    def append(self, value):
+        self._data.append(self._convert(value))
+
+    def extend(self, values):
+        self._data.extend([self._convert(x) for x in values])
+
+    def insert(self, position, value):
+        self._data.insert(position, self._convert(value))
+
+    def tolist(self):
+        return list(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __getitem__(self, item):
+        return self._data[item]
+
+    def __setitem__(self, key, value):
+        self._data[key] = self._convert(value)
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __repr__(self):
+        return '{}({!r}, {!r})'.format(type(self).__name__, self.dtype, self.tolist())
+
+
+class NumpyColumn(TypedColumn):
+    """
+    A typed column kept in a growable numpy array. Missing values are tracked in a boolean mask so the array
+      itself never holds None.
+    """
+
+    def __init__(self, dtype, values=()):
+        """
+        :param dtype: The dtype name, one of NUMPY_DTYPES.
+        :param values: The initial values of the column.
+        """
+        self.dtype = dtype
+        self._convert = CONVERTERS[dtype]
+        self._size = 0
+        self._data = numpy.zeros(8, dtype=NUMPY_DTYPES[dtype])
+        self._mask = numpy.zeros(8, dtype=bool)
+        self.extend(values)
+
+    @classmethod
+    def from_arrays(cls, dtype, array, mask):
+        """
+        Create a column from a numpy array of values and a mask of missing values. Both arrays are copied.
+        :param dtype: The dtype name, one of NUMPY_DTYPES.
+        :param array: A numpy array of values.
+        :param mask: A numpy array which is true where a value is missing.
+        :return: NumpyColumn
+        """
+        column = cls(dtype)
+        column._data = array.astype(NUMPY_DTYPES[dtype])
+        column._mask = mask.astype(bool)
+        column._size = len(column._data)
+        return column
+
+    @property
+    def array(self):
+        """
+        Return a numpy view of the column's values. Missing values hold 0 and are flagged in mask.
+        :return: numpy.ndarray
+        """
+        return self._data[:self._size]
+
+    @property
+    def mask(self):
+        """
+        Return a numpy view of the column's missing value mask. True marks a missing value.
+        :return: numpy.ndarray
+        """
+        return self._mask[:self._size]
+
+    def _reserve(self, size):
+        """
+        Make sure the arrays can hold size values, doubling the capacity when they need to grow.
+        :param size: The number of values to make room for.
+        :return:
+        """
+        capacity = len(self._data)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2)
+        data = numpy.zeros(capacity, dtype=self._data.dtype)
+        mask = numpy.zeros(capacity, dtype=bool)
+        data[:self._size] = self._data[:self._size]
+        mask[:self._size] = self._mask[:self._size]
+        self._data = data
+        self._mask = mask
+
+    def _position(self, position):
+        if position < 0:
+            position += self._size
+        if not 0 <= position < self._size:
+            raise IndexError('column index out of range')
+        return position
+
+    def _put(self, position, value):
+        if value is None:
+            self._data[position] = 0
+            self._mask[position] = True
+        else:
+            self._data[position] = value
+            self._mask[position] = False
+
+    def _store(self, position, value):
+        self._put(position, self._convert(value))
+
+    def append(self, value):
+        value = self._convert(value)
+        self._reserve(self._size + 1)
+        self._put(self._size, value)
+        self._size += 1
+
+    def extend(self, values):
+        values = [self._convert(x) for x in values]
+        size = self._size + len(values)
+        self._reserve(size)
+        if None in values:
+            self._data[self._size:size] = [0 if x is None else x for x in values]
+            self._mask[self._size:size] = [x is None for x in values]
+        else:
+            self._data[self._size:size] = values
+            self._mask[self._size:size] = False
+        self._size = size
+
+    def insert(self, position, value):
+        value = self._convert(value)
+        position = min(max(position + self._size if position < 0 else position, 0), self._size)
+        self._reserve(self._size + 1)
+        self._data[position + 1:self._size + 1] = self._data[position:self._size].copy()
+        self._mask[position + 1:self._size + 1] = self._mask[position:self._size].copy()
+        self._size += 1
+        self._put(position, value)
+
+    def tolist(self):
+        return [None if missing else value for value, missing in izip(self.array.tolist(), self.mask.tolist())]
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for start in xrange(0, self._size, CHUNK_SIZE):
+            for value in self[start:min(start + CHUNK_SIZE, self._size)]:
+                yield value
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            values = self.array[item].tolist()
+            return [None if missing else value for value, missing in izip(values, self.mask[item].tolist())]
+        item = self._position(item)
+        if self._mask[item]:
+            return None
+        return self._data[item].item()
+
+    def __setitem__(self, key, value):
+        self._store(self._position(key), value)
+
+    def __delitem__(self, key):
+        key = self._position(key)
+        self._data[key:self._size - 1] = self._data[key + 1:self._size].copy()
+        self._mask[key:self._size - 1] = self._mask[key + 1:self._size].copy()
+        self._size -= 1
@@ -0,0 +1,374 @@
+"""
+Predicate expressions over the columns of a VTable.
+Expressions are built with col() and compiled once into a generated list comprehension which tests the values of a
+  chunk of rows, read straight from the table's column storage, without a python call per row.
+
+Usage:
+    >>> from vtable.expressions import col
+    >>> expression = (col('Units') > 10) & col('SKU').startswith('B0') & ~col('Status').isin(['CLOSED'])
+    >>> rows = table.filter(expression)
+
+& and | bind tighter than comparisons so comparisons must be put in parentheses when they are combined. Like
+  Query.where, '<', '<=', '>' and '>=' never match None values.
+"""
+from itertools import izip
+
+
+# The comparisons supported by Query.where and Column.
+COMPARISONS = ('==', '!=', '<', '<=', '>', '>=', 'in')
+
+# Comparisons which never match None values.
+ORDERED = frozenset(['<', '<=', '>', '>='])
+
+
+def col(column_header):
+    """
+    Refer to a column in an expression.
+    :param column_header: The column header.
+    :return: Column
+    """
+    return Column(column_header)
+
+
+class Expression(object):
+    """
+    The base class of every expression node. Expressions are combined with &, | and ~.
+    """
+
+    def columns(self):
+        """
+        Return the column headers used by the expression in the order they first appear.
+        :return: list
+        """
+        columns = []
+        for child in self._children():
+            for column_header in child.columns():
+                if column_header not in columns:
+                    columns.append(column_header)
+        return columns
+
+    def conjuncts(self):
+        """
+        Split the expression into the parts which must all be true.
+        :return: list
+        """
+        return [self]
+
+    def _children(self):
+        return ()
+
+    def _source(self, names, constants, checked=True):
+        """
+        Return python source evaluating the expression.
+        :param names: A dictionary of column header -> source reading the column's value.
+        :param constants: A list the constants used by the source are appended to, referred to as k0, k1, ...
+        :param checked: Check the type of values before calling string methods on them. Unchecked source is faster
+            but raises AttributeError or TypeError when it meets a value which is not a string.
+        :return: str
+        """
+        raise NotImplementedError()
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def __nonzero__(self):
+        raise TypeError('Combine expressions with &, | and ~ instead of and, or and not.')
+
+
+def _constant(constants, value):
+    constants.append(value)
+    return 'k{}'.format(len(constants) - 1)
+
+
+class Column(Expression):
+    """
+    A column of the table. Comparing a column with a value or another column creates a Comparison, a column on
+        its own is true when its value is truthy.
+    """
+
+    def __init__(self, column_header):
+        """
+        :param column_header: The column header.
+        """
+        self.column_header = column_header
+
+    def columns(self):
+        return [self.column_header]
+
+    def _source(self, names, constants, checked=True):
+        return names[self.column_header]
+
+    def __eq__(self, other):
+        return Comparison(self, '==', other)
+
+    def __ne__(self, other):
+        return Comparison(self, '!=', other)
+
+    def __lt__(self, other):
+        return Comparison(self, '<', other)
+
+    def __le__(self, other):
+        return Comparison(self, '<=', other)
+
+    def __gt__(self, other):
+        return Comparison(self, '>', other)
+
+    def __ge__(self, other):
+        return Comparison(self, '>=', other)
+
+    def __hash__(self):
+        return hash(self.column_header)
+
+    def isin(self, values):
+        """
+        True when the column's value is one of values.
+        :param values: A collection of values.
+        :return: Comparison
+        """
+        return Comparison(self, 'in', values)
+
+    def is_null(self):
+        """
+        True when the column's value is None.
+        :return: Comparison
+        """
+        return Comparison(self, '==', None)
+
+    def not_null(self):
+        """
+        True when the column's value is not None.
+        :return: Comparison
+        """
+        return Comparison(self, '!=', None)
+
+    def startswith(self, prefix):
+        """
+        True when the column's value is a string starting with prefix.
+        :param prefix: A string or a tuple of strings.
+        :return: StringTest
+        """
+        return StringTest(self, 'startswith', prefix)
+
+    def endswith(self, suffix):
+        """
+        True when the column's value is a string ending with suffix.
+        :param suffix: A string or a tuple of strings.
+        :return: StringTest
+        """
+        return StringTest(self, 'endswith', suffix)
+
+    def contains(self, substring):
+        """
+        True when the column's value is a string containing substring.
+        :param substring: A string.
+        :return: StringTest
+        """
+        return StringTest(self, 'contains', substring)
+
+    def __repr__(self):
+        return 'col({!r})'.format(self.column_header)
+
+
+class Comparison(Expression):
+    """
+    A comparison of a column with a constant or with another column.
+    """
+
+    def __init__(self, column, op, value):
+        """
+        :param column: The Column on the left hand side.
+        :param op: One of COMPARISONS.
+        :param value: A constant, or a Column on the right hand side.
+        """
+        if op not in COMPARISONS:
+            raise ValueError("Unsupported comparison '{}'.".format(op))
+        self.column = column
+        self.op = op
+        self.value = value
+
+    @property
+    def is_constant(self):
+        """
+        Return True when the column is compared with a constant rather than another column.
+        :return: bool
+        """
+        return not isinstance(self.value, Column)
+
+    def _children(self):
+        return (self.column, self.value) if not self.is_constant else (self.column,)
+
+    def _source(self, names, constants, checked=True):
+        left = self.column._source(names, constants, checked)
+        if not self.is_constant:
+            right = self.value._source(names, constants, checked)
+            if self.op in ORDERED:
+                return '({0} is not None and {1} is not None and {0} {2} {1})'.format(left, right, self.op)
+            return '({} {} {})'.format(left, self.op, right)
+        if self.op == 'in':
+            try:
+                values = frozenset(self.value)
+            except TypeError:
+                values = tuple(self.value)
+            return '({} in {})'.format(left, _constant(constants, values))
+        if self.value is None and self.op in ('==', '!='):
+            return '({} {} None)'.format(left, 'is' if self.op == '==' else 'is not')
+        right = _constant(constants, self.value)
+        if self.op in ORDERED:
+            return '({0} is not None and {0} {1} {2})'.format(left, self.op, right)
+        return '({} {} {})'.format(left, self.op, right)
+
+    def __repr__(self):
+        return '({!r} {} {!r})'.format(self.column, self.op, self.value)
+
+
+class StringTest(Expression):
+    """
+    A string method test on a column. Values which are not strings never match.
+    """
+
+    def __init__(self, column, method, argument):
+        """
+        :param column: The Column tested.
+        :param method: 'startswith', 'endswith' or 'contains'.
+        :param argument: The argument of the test.
+        """
+        self.column = column
+        self.method = method
+        self.argument = argument
+
+    def _children(self):
+        return (self.column,)
+
+    def _source(self, names, constants, checked=True):
+        value = self.column._source(names, constants, checked)
+        argument = _constant(constants, self.argument)
+        if self.method == 'contains':
+            # 'in' also works on lists and tuples instead of raising, so containment is always checked.
+            return '(isinstance({0}, basestring) and {1} in {0})'.format(value, argument)
+        test = '{0}.{1}({2})'.format(value, self.method, argument)
+        if checked:
+            return '(isinstance({0}, basestring) and {1})'.format(value, test)
+        return '({0} is not None and {1})'.format(value, test)
+
+    def __repr__(self):
+        return '{!r}.{}({!r})'.format(self.column, self.method, self.argument)
+
+
+class And(Expression):
+    """
+    True when both expressions are true.
+    """
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def _children(self):
+        return (self.left, self.right)
+
+    def conjuncts(self):
+        return self.left.conjuncts() + self.right.conjuncts()
+
+    def _source(self, names, constants, checked=True):
+        left = self.left._source(names, constants, checked)
+        return '({} and {})'.format(left, self.right._source(names, constants, checked))
+
+    def __repr__(self):
+        return '({!r} & {!r})'.format(self.left, self.right)
+
+
+class Or(Expression):
+    """
+    True when either expression is true.
+    """
+
+    def __init__(self, left, right):
+        self.left = left
+        self.right = right
+
+    def _children(self):
+        return (self.left, self.right)
+
+    def _source(self, names, constants, checked=True):
+        left = self.left._source(names, constants, checked)
+        return '({} or {})'.format(left, self.right._source(names, constants, checked))
+
+    def __repr__(self):
+        return '({!r} | {!r})'.format(self.left, self.right)
+
+
+class Not(Expression):
+    """
+    True when the expression is false.
+    """
+
+    def __init__(self, operand):
+        self.operand = operand
+
+    def _children(self):
+        return (self.operand,)
+
+    def _source(self, names, constants, checked=True):
+        return '(not {})'.format(self.operand._source(names, constants, checked))
+
+    def __repr__(self):
+        return '~{!r}'.format(self.operand)
+
+
+def _compile(expression, names, arguments, targets, checked):
+    constants = []
+    condition = expression._source(names, constants, checked)
+    source = 'def select(positions, {0}):\n    return [i for i, {1} in izip(positions, {0}) if {2}]\n'.format(
+        arguments, targets, condition)
+    namespace = {'izip': izip}
+    for i, value in enumerate(constants):
+        namespace['k{}'.format(i)] = value
+    exec compile(source, '<vtable expression>', 'exec') in namespace
+    return namespace['select'], source
+
+
+def compile_filter(expression, slots=None):
+    """
+    Compile an expression into a function selecting the matching rows of a chunk.
+    The function takes the row indexes of the chunk followed by one list of values per column of the expression,
+        in the order of expression.columns(), and returns the row indexes for which the expression is true.
+    With slots it takes the row indexes followed by a single list holding the list of values of each row instead.
+    String tests are first run without checking the type of each value, a chunk holding a value which is not a
+        string is run again with the checks.
+
+    Usage:
+        >>> columns, select = compile_filter(col('Units') > 10)
+        >>> print select([0, 1, 2], [5, 20, 30])
+        >>> # [1, 2]
+        >>> columns, select = compile_filter(col('Units') > 10, slots={'Units': 1})
+        >>> print select([0, 1, 2], [['1', 5], ['2', 20], ['3', 30]])
+        >>> # [1, 2]
+    :param expression: The Expression to compile.
+    :param slots: A dictionary of column header -> position of the column's value in a row's list of values.
+    :return: A tuple of the list of column headers used and the compiled function.
+    """
+    columns = expression.columns()
+    if slots is None:
+        names = {column_header: 'v{}'.format(i) for i, column_header in enumerate(columns)}
+        arguments = ', '.join('c{}'.format(i) for i in range(len(columns)))
+        targets = ', '.join(names[column_header] for column_header in columns)
+    else:
+        names = {column_header: 'r[{}]'.format(slots[column_header]) for column_header in columns}
+        arguments, targets = 'rows', 'r'
+    checked, checked_source = _compile(expression, names, arguments, targets, True)
+    unchecked, unchecked_source = _compile(expression, names, arguments, targets, False)
+    if unchecked_source == checked_source:
+        return columns, checked
+
+    def select(positions, *chunks):
+        try:
+            return unchecked(positions, *chunks)
+        except (AttributeError, TypeError):
+            return checked(positions, *chunks)
+    return columns, select
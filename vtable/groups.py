@@ -0,0 +1,133 @@
+"""
+Group by aggregation over a VTable.
+Rows are grouped with a single pass over the group column which hashes each value to the list of row indexes
+  holding it. Each aggregated column is then read once straight from the table's storage and every group's values
+  are fed to an Aggregator, so no row objects are created and no other column is read.
+"""
+from vtable import VTable, Aggregator
+
+
+class GroupBy(object):
+    """
+    The rows of a VTable grouped by the value of a column.
+
+    Usage:
+        >>> totals = table.group_by('SKU').agg({'Units': 'sum', 'Box': 'count'})
+        >>> print totals['Units', 'B000123']
+        >>> stats = table.group_by('SKU').agg({'Units': ['min', 'max']})
+        >>> print stats['Units_max', 'B000123']
+
+    Groups are kept in the order their value first appears in the table. Rows with None in the group column form
+        a group of their own.
+    """
+
+    def __init__(self, table, column_header):
+        """
+        :param table: The VTable to group.
+        :param column_header: The column to group the rows by.
+        """
+        if column_header not in table.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_header))
+        self._table = table
+        self.column_header = column_header
+        self._keys = None
+        self._groups = None
+
+    def _group(self):
+        """
+        Hash every value of the group column to the row indexes holding it. Only done once per GroupBy.
+        :return:
+        """
+        if self._groups is not None:
+            return
+        keys = []
+        groups = {}
+        for i, value in enumerate(self._table._iter_column(self.column_header)):
+            positions = groups.get(value)
+            if positions is None:
+                positions = groups[value] = []
+                keys.append(value)
+            positions.append(i)
+        self._keys = keys
+        self._groups = groups
+
+    def rows(self, key):
+        """
+        Return the rows of a group in row index order.
+        :param key: The group value.
+        :return: A list of rows.
+        """
+        self._group()
+        rows = self._table._rows
+        return [rows[i] for i in self._groups.get(key, ())]
+
+    def _outputs(self, spec):
+        """
+        Normalize an aggregation spec to a list of (output column header, column header, reduction) triples.
+        :param spec: A dictionary of column header -> reduction name or list of reduction names.
+        :return: list
+        """
+        outputs = []
+        for column_header in sorted(spec):
+            if column_header not in self._table.schema.positions:
+                raise KeyError("'{}' not in column headers.".format(column_header))
+            reductions = spec[column_header]
+            if isinstance(reductions, basestring):
+                outputs.append((column_header, column_header, reductions))
+            else:
+                for reduction in reductions:
+                    outputs.append(('{}_{}'.format(column_header, reduction), column_header, reduction))
+        headers = [self.column_header] + [output for output, column_header, reduction in outputs]
+        if len(set(headers)) != len(headers):
+            raise ValueError('Aggregating the group column needs a list of reductions to name its columns.')
+        # Aggregator rejects unsupported reductions before any column is read.
+        Aggregator([reduction for output, column_header, reduction in outputs])
+        return outputs
+
+    def agg(self, spec, columnar=None):
+        """
+        Aggregate columns per group into a new VTable with one row per group, the group value being the row header.
+        None values are skipped like Aggregator does, so 'count' counts the rows with a value in the column.
+
+        Usage:
+            >>> totals = table.group_by('SKU').agg({'Units': 'sum', 'Box': 'count'})
+        :param spec: A dictionary of column header -> reduction name from AGGREGATES, or a list of reduction
+            names. A single reduction keeps the column header, a list names the columns '<column>_<reduction>'.
+            Columns are added in column header order.
+        :param columnar: Store the new table in a ColumnStore, defaults to the storage of the grouped table.
+        :return: VTable
+        """
+        outputs = self._outputs(spec)
+        self._group()
+        table = self._table
+        if columnar is None:
+            columnar = table.columnar
+        columns = [list(self._keys)]
+        reductions = {}
+        for output, column_header, reduction in outputs:
+            reductions.setdefault(column_header, []).append(reduction)
+        results = {}
+        for column_header, names in reductions.items():
+            values = table._column_values(column_header)
+            values = values if isinstance(values, list) else list(values)
+            get = values.__getitem__
+            column_results = []
+            for key in self._keys:
+                aggregator = Aggregator(names)
+                aggregator.update(map(get, self._groups[key]))
+                column_results.append(aggregator.result())
+            results[column_header] = column_results
+        for output, column_header, reduction in outputs:
+            columns.append([result[reduction] for result in results[column_header]])
+        headers = [self.column_header] + [output for output, column_header, reduction in outputs]
+        grouped = VTable(headers, [], columnar=columnar)
+        grouped._load_columns(columns)
+        return grouped
+
+    def __len__(self):
+        self._group()
+        return len(self._keys)
+
+    def __iter__(self):
+        self._group()
+        return iter(self._keys)
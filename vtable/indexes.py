@@ -0,0 +1,317 @@
+"""
+Secondary indexes used by VTable to find rows by the value of a column without scanning every row.
+Indexes map column values to row headers, which never change while a row is in the table, so rows can be inserted
+  or deleted without renumbering the index. VTable keeps its indexes up to date on every write it makes.
+Composite indexes cover several columns and map tuples of the columns' values in column order.
+"""
+import operator
+from bisect import bisect_left, bisect_right
+from itertools import chain, compress, count, imap, islice
+
+
+class Index(object):
+    """
+    The interface shared by every index kind. Subclasses implement build(), add(), remove() and get().
+    """
+
+    column_header = None
+    columns = ()
+    unique = False
+
+    def _is_missing(self, value):
+        """
+        Return True for values exempt from unique checks: None, or a composite value with a None in it.
+        """
+        return value is None or (len(self.columns) > 1 and None in value)
+
+    def update(self, changes):
+        """
+        Move rows from their old values to their new values. Either every change is made or none of them are.
+        :param changes: A list of (row_header, old_value, new_value) triples.
+        :return:
+        """
+        for row_header, old, new in changes:
+            self.remove(row_header, old)
+        added = []
+        try:
+            for row_header, old, new in changes:
+                self.add(row_header, new)
+                added.append((row_header, new))
+        except ValueError:
+            for row_header, new in added:
+                self.remove(row_header, new)
+            for row_header, old, new in changes:
+                self.add(row_header, old)
+            raise
+
+    def _duplicate(self, value):
+        return ValueError('Value "{}" already in unique index on "{}"'.format(value, self.column_header))
+
+    def __repr__(self):
+        return '{}({!r}, unique={!r})'.format(type(self).__name__, self.column_header, self.unique)
+
+
+class HashIndex(Index):
+    """
+    A hash index of column value -> row headers.
+    Unique indexes hold at most one row per value, None values are exempt so rows without a value can share it.
+    Composite values with a None in them are exempt as well.
+
+    Usage:
+        >>> index = HashIndex('ASIN')
+        >>> index.build([('1', 'B000123'), ('2', 'B000123')])
+        >>> print index.get('B000123')
+        >>> # ['1', '2']
+    """
+
+    def __init__(self, column_header, unique=False, columns=None):
+        """
+        :param column_header: The indexed column header, or the name of a composite index.
+        :param unique: Raise ValueError when a value is added for a second row.
+        :param columns: The columns of a composite index, defaults to just column_header.
+        """
+        self.column_header = column_header
+        self.columns = tuple(columns) if columns else (column_header,)
+        self.unique = unique
+        # value -> row header for unique indexes, value -> set of row headers otherwise
+        self._entries = {}
+
+    def _is_single(self, value):
+        return self.unique and not self._is_missing(value)
+
+    def build(self, items):
+        """
+        Replace the contents of the index.
+        :param items: An iterable of (row_header, value) pairs.
+        :return:
+        """
+        self._entries = {}
+        for row_header, value in items:
+            self.add(row_header, value)
+
+    def add(self, row_header, value):
+        """
+        Add a row's value to the index.
+        :param row_header: The row header.
+        :param value: The row's value in the indexed column.
+        :return:
+        """
+        if self._is_single(value):
+            if value in self._entries:
+                raise self._duplicate(value)
+            self._entries[value] = row_header
+        elif value in self._entries:
+            self._entries[value].add(row_header)
+        else:
+            self._entries[value] = {row_header}
+
+    def remove(self, row_header, value):
+        """
+        Remove a row's value from the index.
+        :param row_header: The row header.
+        :param value: The row's value in the indexed column.
+        :return:
+        """
+        if self._is_single(value):
+            if self._entries.get(value) == row_header:
+                del self._entries[value]
+            return
+        row_headers = self._entries.get(value)
+        if row_headers is not None:
+            row_headers.discard(row_header)
+            if not row_headers:
+                del self._entries[value]
+
+    def get(self, value):
+        """
+        Return the row headers of the rows holding a value.
+        :param value: The value to look up.
+        :return: list
+        """
+        if value not in self._entries:
+            return []
+        if self._is_single(value):
+            return [self._entries[value]]
+        return list(self._entries[value])
+
+    def __contains__(self, item):
+        return item in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SortedIndex(Index):
+    """
+    An index keeping a column's values in sorted order for range queries, backed by two parallel lists searched
+      with bisect. Lookups are O(log n), adding or removing a value moves the entries after it.
+    None values, and composite values with a None in them, are kept apart from the sorted values and never match
+      a range.
+
+    Usage:
+        >>> index = SortedIndex('Units')
+        >>> index.build([('1', 30), ('2', 10), ('3', 20)])
+        >>> print index.range(15, 30)
+        >>> # ['3', '1']
+    """
+
+    def __init__(self, column_header, unique=False, columns=None):
+        """
+        :param column_header: The indexed column header, or the name of a composite index.
+        :param unique: Raise ValueError when a value is added for a second row.
+        :param columns: The columns of a composite index, defaults to just column_header.
+        """
+        self.column_header = column_header
+        self.columns = tuple(columns) if columns else (column_header,)
+        self.unique = unique
+        self._values = []
+        self._row_headers = []
+        # row header -> value of the rows with a missing value
+        self._missing = {}
+
+    def build(self, items):
+        """
+        Replace the contents of the index.
+        :param items: An iterable of (row_header, value) pairs.
+        :return:
+        """
+        entries = []
+        missing = {}
+        for row_header, value in items:
+            if self._is_missing(value):
+                missing[row_header] = value
+            else:
+                entries.append((value, row_header))
+        entries.sort(key=lambda entry: entry[0])
+        values = [entry[0] for entry in entries]
+        if self.unique:
+            for i in xrange(1, len(values)):
+                if values[i] == values[i - 1]:
+                    raise self._duplicate(values[i])
+        self._values = values
+        self._row_headers = [entry[1] for entry in entries]
+        self._missing = missing
+
+    def add(self, row_header, value):
+        """
+        Add a row's value to the index.
+        :param row_header: The row header.
+        :param value: The row's value in the indexed column.
+        :return:
+        """
+        if self._is_missing(value):
+            self._missing[row_header] = value
+            return
+        i = bisect_right(self._values, value)
+        if self.unique and i and self._values[i - 1] == value:
+            raise self._duplicate(value)
+        self._values.insert(i, value)
+        self._row_headers.insert(i, row_header)
+
+    def remove(self, row_header, value):
+        """
+        Remove a row's value from the index.
+        :param row_header: The row header.
+        :param value: The row's value in the indexed column.
+        :return:
+        """
+        if self._is_missing(value):
+            self._missing.pop(row_header, None)
+            return
+        for i in xrange(bisect_left(self._values, value), bisect_right(self._values, value)):
+            if self._row_headers[i] == row_header:
+                del self._values[i]
+                del self._row_headers[i]
+                return
+
+    def get(self, value):
+        """
+        Return the row headers of the rows holding a value.
+        :param value: The value to look up.
+        :return: list
+        """
+        if self._is_missing(value):
+            return [row_header for row_header, missing in self._missing.items() if missing == value]
+        return self._row_headers[bisect_left(self._values, value):bisect_right(self._values, value)]
+
+    def _slice(self, start, stop, descending=False, key=None):
+        """
+        Return the row headers between two positions of the sorted lists in value order.
+        :param start: The position of the first entry.
+        :param stop: The position after the last entry.
+        :param descending: Start with the largest value.
+        :param key: A function of row header -> row index ordering rows with equal values. Without it they are kept
+            in the order they were added, reversed when descending.
+        :return: list
+        """
+        row_headers = self._row_headers[start:stop]
+        if key is not None and len(row_headers) > 1:
+            values = self._values[start:stop]
+            # The positions holding the same value as the position before them, found without a python loop.
+            ties = list(compress(count(1), imap(operator.eq, islice(values, 1, None), values)))
+            i = 0
+            while i < len(ties):
+                j = i
+                while j + 1 < len(ties) and ties[j + 1] == ties[j] + 1:
+                    j += 1
+                first, last = ties[i] - 1, ties[j] + 1
+                row_headers[first:last] = sorted(row_headers[first:last], key=key, reverse=descending)
+                i = j + 1
+        if descending:
+            row_headers.reverse()
+        return row_headers
+
+    def range(self, lo=None, hi=None, key=None, descending=False):
+        """
+        Return the row headers of the rows with a value between lo and hi, in ascending value order.
+        :param lo: The lowest value to include, None for no lower bound.
+        :param hi: The highest value to include, None for no upper bound.
+        :param key: A function of row header -> row index ordering rows with equal values.
+        :param descending: Return the largest values first. Rows with equal values keep the order given by key.
+        :return: list
+        """
+        start = 0 if lo is None else bisect_left(self._values, lo)
+        stop = len(self._values) if hi is None else bisect_right(self._values, hi)
+        return self._slice(start, max(start, stop), descending, key)
+
+    def top_k(self, k, key=None):
+        """
+        Return the row headers of the k rows with the largest values, largest first.
+        :param k: The number of rows.
+        :param key: A function of row header -> row index ordering rows with equal values.
+        :return: list
+        """
+        size = len(self._values)
+        if k <= 0 or not size:
+            return []
+        # Rows sharing the smallest value taken compete for the last places, so all of them are ranked.
+        start = max(size - k, 0)
+        start = bisect_left(self._values, self._values[start], 0, start)
+        return self._slice(start, size, True, key)[:k]
+
+    def ordered(self, descending=False, key=None):
+        """
+        Iterate over every row header in value order, rows with a missing value last.
+        :param descending: Start with the largest value. Rows with equal values keep the order given by key.
+        :param key: A function of row header -> row index ordering rows with equal values and the rows with a
+            missing value.
+        :return: An iterator of row headers.
+        """
+        missing = list(self._missing) if key is None else sorted(self._missing, key=key)
+        return chain(self._slice(0, len(self._values), descending, key), missing)
+
+    def __contains__(self, item):
+        if self._is_missing(item):
+            return item in self._missing.values()
+        i = bisect_left(self._values, item)
+        return i < len(self._values) and self._values[i] == item
+
+    def __len__(self):
+        return len(self._values) + len(self._missing)
+
+
+# The index kinds supported by VTable.create_index.
+INDEX_KINDS = {
+    'hash': HashIndex,
+    'sorted': SortedIndex,
+}
@@ -0,0 +1,240 @@
+"""
+Read-only VTables which memory map a binary snapshot written with VTable.dump_binary_to().
+Opening a mapped table only reads the snapshot's meta block. Cell lookups decode single values straight from the
+  mapped file and row headers are found with a binary search over the snapshot's lookup block, so many processes
+  can share one snapshot through the page cache instead of each holding a parsed copy.
+"""
+import mmap
+from bisect import bisect_left, bisect_right
+from itertools import islice
+
+from vtable import VTable, ColumnStore, VColumnRow, VSchema, _open_source, binary
+
+# The number of values decoded at a time when iterating over a mapped column.
+CHUNK_SIZE = 4096
+
+# One in this many sorted row headers is kept in memory to find row headers in the lookup blocks.
+LOOKUP_STRIDE = 64
+
+
+def _read_only(*args, **kwargs):
+    raise TypeError('Memory mapped tables are read-only.')
+
+
+class MappedColumn(object):
+    """
+    A read-only list like view of one column block of a mapped snapshot.
+    """
+
+    __slots__ = ('_buffer', '_kind', '_layout', '_offset', '_size')
+
+    def __init__(self, buf, kind, layout, offset, size):
+        """
+        :param buf: The mapped snapshot.
+        :param kind: The block kind.
+        :param layout: The block's layout dictionary.
+        :param offset: The offset of the block in the snapshot.
+        :param size: The number of values in the column.
+        """
+        self._buffer = buf
+        self._kind = kind
+        self._layout = layout
+        self._offset = offset
+        self._size = size
+
+    def _decode(self, start, stop):
+        return binary.decode_range(self._buffer, self._kind, self._layout, self._offset, self._size, start, stop)
+
+    def tolist(self):
+        return self._decode(0, self._size)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for start in xrange(0, self._size, CHUNK_SIZE):
+            for value in self._decode(start, min(start + CHUNK_SIZE, self._size)):
+                yield value
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(self._size)
+            if step != 1:
+                return self.tolist()[item]
+            return self._decode(start, max(start, stop))
+        if item < 0:
+            item += self._size
+        if not 0 <= item < self._size:
+            raise IndexError('column index out of range')
+        return self._decode(item, item + 1)[0]
+
+    __setitem__ = __delitem__ = append = extend = insert = _read_only
+
+
+class MappedStore(ColumnStore):
+    """
+    A read-only ColumnStore whose columns are MappedColumns.
+    """
+
+    def __init__(self, buf, meta):
+        """
+        :param buf: The mapped snapshot.
+        :param meta: The snapshot's meta dictionary.
+        """
+        self.schema = VSchema(meta['column_headers'])
+        self.dtypes = dict(meta['dtypes'])
+        self.size = meta['size']
+        self.data = [MappedColumn(buf, kind, layout, offset, self.size)
+                     for kind, offset, length, layout in meta['blocks']]
+
+    append_row = insert_row = delete_row = set_column = fill = set = load_columns = _read_only
+    add_column = drop_column = reorder = _read_only
+
+
+class MappedRows(object):
+    """
+    The rows of a mapped table in row index order. Row views are created when they are accessed.
+    """
+
+    __slots__ = ('_store',)
+
+    def __init__(self, store):
+        self._store = store
+
+    def __len__(self):
+        return self._store.size
+
+    def __iter__(self):
+        store = self._store
+        return (VColumnRow(store, position) for position in xrange(store.size))
+
+    def __getitem__(self, item):
+        if item < 0:
+            item += self._store.size
+        if not 0 <= item < self._store.size:
+            raise IndexError('row index out of range')
+        return VColumnRow(self._store, item)
+
+
+class MappedRowIndex(object):
+    """
+    The row header -> row mapping of a mapped table.
+    Row headers are found in the snapshot's lookup blocks, which hold the row headers in sorted order and their row
+      positions. Only every LOOKUP_STRIDE-th sorted row header is read into memory, the first time it is needed, to
+      pick the stretch of the lookup blocks decoded for a row header. Snapshots without lookup blocks, written for
+      None or mixed type row headers, fall back to a header -> position dictionary built from the row header
+      column the first time it is needed, which every process holds a copy of.
+    """
+
+    __slots__ = ('_store', '_lookup', '_fences', '_positions')
+
+    def __init__(self, store, lookup=None):
+        """
+        :param store: The MappedStore of the table.
+        :param lookup: A pair of MappedColumns of the sorted row headers and their row positions, or None.
+        """
+        self._store = store
+        self._lookup = lookup
+        self._fences = None
+        self._positions = None
+
+    def position(self, row_header):
+        """
+        Return the position of a row in the store.
+        :param row_header: The row header.
+        :return: int, or None when the row header is not in the table.
+        """
+        if self._lookup is None:
+            if self._positions is None:
+                self._positions = {header: i for i, header in enumerate(self._store.data[0])}
+            return self._positions.get(row_header)
+        keys, positions = self._lookup
+        if self._fences is None:
+            self._fences = list(islice(keys, 0, None, LOOKUP_STRIDE))
+        start = (bisect_right(self._fences, row_header) - 1) * LOOKUP_STRIDE
+        if start < 0:
+            return None
+        chunk = keys[start:start + LOOKUP_STRIDE]
+        i = bisect_left(chunk, row_header)
+        if i < len(chunk) and chunk[i] == row_header:
+            return positions[start + i]
+        return None
+
+    def __contains__(self, item):
+        return self.position(item) is not None
+
+    def __getitem__(self, item):
+        position = self.position(item)
+        if position is None:
+            raise KeyError(item)
+        return VColumnRow(self._store, position)
+
+    def keys(self):
+        return list(self._store.data[0])
+
+    def values(self):
+        return list(MappedRows(self._store))
+
+    def items(self):
+        return zip(self.keys(), self.values())
+
+    def __iter__(self):
+        return iter(self._store.data[0])
+
+    def __len__(self):
+        return self._store.size
+
+
+class MappedVTable(VTable):
+    """
+    A read-only VTable backed by a memory mapped binary snapshot.
+    Every read method of VTable is available, methods which modify the table raise TypeError.
+
+    Usage:
+        >>> table.dump_binary_to(open('reference.vtb', 'wb'))
+        >>> with VTable.open_binary('reference.vtb') as reference:
+        >>>     print reference['Units', 'SKU-1']
+    """
+
+    def __init__(self, source):
+        """
+        :param source: A file path or a file object opened for reading.
+        """
+        fileobj, self._close_file = _open_source(source)
+        self._file = fileobj
+        self._buffer = mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ)
+        meta = binary.read_meta(self._buffer)
+        self._store = MappedStore(self._buffer, meta)
+        self.schema = self._store.schema
+        self.column_headers = list(self.schema.headers)
+        lookup = None
+        if meta['lookup'] is not None:
+            lookup = tuple(MappedColumn(self._buffer, kind, layout, offset, self._store.size)
+                           for kind, offset, length, layout in meta['lookup'])
+        self.table_data = MappedRowIndex(self._store, lookup)
+        self._rows = MappedRows(self._store)
+        self._indexes = {}
+
+    @property
+    def row_headers(self):
+        return self.table_data.keys()
+
+    def close(self):
+        """
+        Unmap the snapshot. The table can not be used afterwards.
+        :return:
+        """
+        self._buffer.close()
+        if self._close_file:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    set_cell_value = set_many = update = fill_column = _writable_column = _set_column_values = _read_only
+    _append_row = _load_columns = append_row = extend_rows = insert_row = delete_row = _read_only
+    add_column = drop_column = sort_by = _read_only
+    __setitem__ = _read_only
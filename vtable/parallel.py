@@ -0,0 +1,106 @@
+"""
+Parallel loading of large delimited files.
+The file is split into byte ranges which end on line boundaries, each range is parsed in a worker process and the
+  parsed columns are joined in file order into a single VTable.
+
+Ranges are split on newlines, so csv files with quoted values containing newlines can not be loaded in parallel.
+"""
+import csv
+import multiprocessing
+import os
+
+# Files smaller than this are parsed in the calling process.
+MIN_PARALLEL_SIZE = 1 << 20
+
+
+def chunk_ranges(path, start, chunks):
+    """
+    Split a file into byte ranges which begin at the start of a line.
+    :param path: The file path.
+    :param start: The offset to start splitting from, usually the end of the header line.
+    :param chunks: The number of ranges to aim for.
+    :return: A list of (start, stop) tuples covering start to the end of the file.
+    """
+    size = os.path.getsize(path)
+    boundaries = [start]
+    with open(path, 'rb') as fileobj:
+        for i in range(1, chunks):
+            position = start + (size - start) * i // chunks
+            if position <= boundaries[-1]:
+                continue
+            fileobj.seek(position - 1)
+            fileobj.readline()
+            position = fileobj.tell()
+            if boundaries[-1] < position < size:
+                boundaries.append(position)
+    boundaries.append(size)
+    return zip(boundaries[:-1], boundaries[1:])
+
+
+def _parse_chunk(args):
+    """
+    Parse a byte range of a file into columns. Runs in a worker process.
+    :param args: A tuple of (path, start, stop, delimiter, flat, width).
+    :return: A list with one list of values per column.
+    """
+    path, start, stop, delimiter, flat, width = args
+    with open(path, 'rb') as fileobj:
+        fileobj.seek(start)
+        lines = fileobj.read(stop - start).split('\n')
+    if flat:
+        lines = (line.strip('\r') for line in lines)
+        rows = [line.split(delimiter) for line in lines if line]
+    else:
+        rows = csv.reader(lines, delimiter=delimiter)
+    padding = [None] * width
+    rows = [(row + padding[len(row):])[:width] for row in rows if row and row != ['']]
+    if not rows:
+        return [[] for _ in range(width)]
+    return [list(values) for values in zip(*rows)]
+
+
+def read_parallel(cls, path, delimiter, flat=False, processes=None, columnar=False, dtypes=None):
+    """
+    Load a delimited file into a table, parsing it in several processes. Empty lines are skipped.
+    :param cls: The VTable class to create.
+    :param path: The file path.
+    :param delimiter: The delimiter separating the values of each line.
+    :param flat: Split lines on the delimiter like load_flat_file instead of parsing them as csv.
+    :param processes: The number of worker processes, defaults to the number of cpus.
+    :param columnar: Store the table data in a ColumnStore instead of one VRow per row.
+    :param dtypes: A dictionary of column header -> dtype declaring typed columns.
+    :return: VTable
+    """
+    with open(path, 'rb') as fileobj:
+        header_line = fileobj.readline()
+        header_end = fileobj.tell()
+    if not header_line.strip('\r\n'):
+        raise ValueError('No column headers found.')
+    if flat:
+        column_headers = header_line.rstrip('\n').strip('\r').split(delimiter)
+    else:
+        column_headers = next(csv.reader([header_line], delimiter=delimiter))
+    width = len(column_headers)
+
+    processes = processes or multiprocessing.cpu_count()
+    if os.path.getsize(path) < MIN_PARALLEL_SIZE:
+        processes = 1
+    tasks = [(path, start, stop, delimiter, flat, width)
+             for start, stop in chunk_ranges(path, header_end, processes * 4 if processes > 1 else 1)]
+    if processes > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            chunks = pool.map(_parse_chunk, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        chunks = [_parse_chunk(task) for task in tasks]
+
+    columns = [[] for _ in range(width)]
+    for chunk in chunks:
+        for column, values in zip(columns, chunk):
+            column.extend(values)
+    table = cls(column_headers, [], columnar=columnar, dtypes=dtypes)
+    table._load_columns(columns)
+    return table
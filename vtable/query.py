@@ -0,0 +1,302 @@
+"""
+Lazy queries over a VTable.
+A Query only records its plan when where(), select(), order_by() and limit() are called. Iterating over it runs the
+  plan in a single pass over the table, a chunk of rows at a time, which reads only the columns the plan uses
+  straight from the table's storage. Candidate rows come from an index when a condition or the ordering can use
+  one, and the pass stops early once limit() rows were found unless the rows have to be sorted first.
+"""
+import operator
+from itertools import izip, imap, chain, islice, repeat
+
+from vtable import VTable
+from vtable.expressions import Expression, Column, Comparison, And, COMPARISONS, ORDERED, compile_filter
+from vtable.indexes import SortedIndex
+
+# The number of rows tested at a time. Queries with a limit stop after the chunk which completes the result.
+CHUNK_SIZE = 1024
+
+
+class Query(object):
+    """
+    A lazy query over a VTable. Every builder method returns a new Query so partial queries can be reused.
+
+    Usage:
+        >>> query = table.query().where('Units', '>', 10).where('Status', '==', 'WORKING')
+        >>> query = query.select(['SKU', 'Units']).order_by('Units', descending=True).limit(100)
+        >>> for row_header, sku, units in query:
+        >>>     print sku, units
+        >>> top = query.to_table()
+        >>> query = table.query().where((col('Units') > 10) & col('SKU').startswith('B0'))
+
+    Iterating over a query yields a tuple of the selected values for each matching row, the row header first.
+        rows() yields the matching rows of the table instead and to_table() builds a new VTable.
+    """
+
+    def __init__(self, table):
+        """
+        :param table: The VTable to query.
+        """
+        self._table = table
+        self._conditions = []
+        self._expressions = []
+        self._predicates = []
+        self._columns = None
+        self._order = []
+        self._limit = None
+
+    def _copy(self):
+        query = Query(self._table)
+        query._conditions = list(self._conditions)
+        query._expressions = list(self._expressions)
+        query._predicates = list(self._predicates)
+        query._columns = self._columns
+        query._order = list(self._order)
+        query._limit = self._limit
+        return query
+
+    def _check_column(self, column_header):
+        if column_header not in self._table.schema.positions:
+            raise KeyError("'{}' not in column headers.".format(column_header))
+
+    def where(self, column_header, op=None, value=None):
+        """
+        Only keep rows matching a condition. Conditions of several where() calls must all match.
+        Conditions and expressions are compiled into a single filter, a callable is called once per row.
+        :param column_header: The column to compare, an Expression built with col(), or a callable taking a row and
+            returning True to keep it.
+        :param op: One of '==', '!=', '<', '<=', '>', '>=' or 'in'. '<', '<=', '>' and '>=' never match None.
+        :param value: The value to compare the column with, a collection of values for 'in'.
+        :return: Query
+        """
+        query = self._copy()
+        if op is None and isinstance(column_header, Expression):
+            for part in column_header.conjuncts():
+                for header in part.columns():
+                    self._check_column(header)
+                # Comparisons with a constant are kept apart so they can be answered from an index.
+                if isinstance(part, Comparison) and part.is_constant:
+                    query._conditions.append((part.column.column_header, part.op, part.value))
+                else:
+                    query._expressions.append(part)
+            return query
+        if op is None and callable(column_header):
+            query._predicates.append(column_header)
+            return query
+        self._check_column(column_header)
+        if op not in COMPARISONS:
+            raise ValueError("Unsupported comparison '{}'.".format(op))
+        query._conditions.append((column_header, op, value))
+        return query
+
+    def select(self, column_headers):
+        """
+        Choose the columns of the result. The row header column is always included as the first column.
+        :param column_headers: A list of column headers.
+        :return: Query
+        """
+        for column_header in column_headers:
+            self._check_column(column_header)
+        query = self._copy()
+        header_column = self._table.schema.headers[0]
+        query._columns = [header_column] + [c for c in column_headers if c != header_column]
+        return query
+
+    def order_by(self, column_header, descending=False):
+        """
+        Sort the result by a column. Later order_by() calls break ties of earlier ones. None values sort last.
+        :param column_header: The column to sort by.
+        :param descending: Sort from the largest value to the smallest.
+        :return: Query
+        """
+        self._check_column(column_header)
+        query = self._copy()
+        query._order.append((column_header, descending))
+        return query
+
+    def limit(self, count):
+        """
+        Stop after count rows.
+        :param count: The maximum number of rows in the result.
+        :return: Query
+        """
+        query = self._copy()
+        query._limit = count
+        return query
+
+    @property
+    def column_headers(self):
+        """
+        Return the column headers of the result.
+        :return: list
+        """
+        if self._columns is None:
+            return list(self._table.schema.headers)
+        return list(self._columns)
+
+    def _candidates(self):
+        """
+        Choose the rows the pass has to look at.
+        :return: A tuple of a list of row indexes, or None to scan every row, and whether the indexes are already
+            in the requested order.
+        """
+        table = self._table
+        header_column = table.schema.headers[0]
+        equal = {}
+        for column_header, op, value in self._conditions:
+            if op == '==':
+                equal[column_header] = value
+        if header_column in equal:
+            row_header = equal[header_column]
+            return ([table.table_data[row_header].index] if row_header in table.table_data else []), False
+        best = table._best_index(equal)
+        if best is not None:
+            if len(best.columns) == 1:
+                row_headers = best.get(equal[best.columns[0]])
+            else:
+                row_headers = best.get(tuple(equal[column_header] for column_header in best.columns))
+            return sorted(table.table_data[row_header].index for row_header in row_headers), False
+        for column_header, op, value in self._conditions:
+            index = table._indexes.get(column_header)
+            if op in ORDERED and isinstance(index, SortedIndex):
+                lo = value if op in ('>', '>=') else None
+                hi = value if op in ('<', '<=') else None
+                if len(self._order) == 1 and self._order[0][0] == column_header:
+                    row_headers = index.range(lo, hi, table._row_index, self._order[0][1])
+                    return [table.table_data[row_header].index for row_header in row_headers], True
+                row_headers = index.range(lo, hi)
+                return sorted(table.table_data[row_header].index for row_header in row_headers), False
+        if len(self._order) == 1:
+            column_header, descending = self._order[0]
+            index = table._indexes.get(column_header)
+            if isinstance(index, SortedIndex):
+                row_headers = index.ordered(descending, table._row_index)
+                return [table.table_data[row_header].index for row_header in row_headers], True
+        return None, False
+
+    def _read(self, column_headers, selected):
+        """
+        Read the values of some columns for some rows straight from the table's storage.
+        :param column_headers: The columns to read.
+        :param selected: A list of row indexes.
+        :return: A list with a tuple of values per row.
+        """
+        table = self._table
+        if table._store is not None:
+            return zip(*[map(table._store.column(column_header).__getitem__, selected)
+                         for column_header in column_headers])
+        rows = table._rows
+        values = [rows[i]._values for i in selected]
+        slots = [table.schema.positions[column_header] for column_header in column_headers]
+        if len(slots) == 1:
+            return zip(map(operator.itemgetter(slots[0]), values))
+        return map(operator.itemgetter(*slots), values)
+
+    def _filter(self):
+        """
+        Compile the conditions and expressions of the query into a single filter.
+        :return: A tuple of the columns the filter reads and the function returned by compile_filter(), or
+            (None, None) when the query has no conditions. Tables stored by row get a filter reading the rows'
+            lists of values.
+        """
+        parts = [Comparison(Column(column_header), op, value) for column_header, op, value in self._conditions]
+        parts.extend(self._expressions)
+        if not parts:
+            return None, None
+        if self._table._store is not None:
+            return compile_filter(reduce(And, parts))
+        return compile_filter(reduce(And, parts), slots=self._table.schema.positions)
+
+    def _matches(self, positions):
+        """
+        Find the matching rows CHUNK_SIZE rows at a time. The compiled filter is run over slices of the columns it
+            reads, or of the rows for tables stored by row, the predicates are only called for the rows it selects.
+        :param positions: The candidate row indexes, or None for every row.
+        :return: An iterator of lists of row indexes, one per chunk.
+        """
+        columns, select = self._filter()
+        store = self._table._store
+        predicates = self._predicates
+        rows = self._table._rows
+        size = len(rows) if positions is None else len(positions)
+        for start in xrange(0, size, CHUNK_SIZE):
+            stop = min(start + CHUNK_SIZE, size)
+            selected = xrange(start, stop) if positions is None else positions[start:stop]
+            if select is not None:
+                if store is None:
+                    chunk = rows[start:stop] if positions is None else map(rows.__getitem__, selected)
+                    selected = select(selected, [row._values for row in chunk])
+                elif positions is None:
+                    selected = select(selected, *[store.column(c)[start:stop] for c in columns])
+                else:
+                    selected = select(selected, *[map(store.column(c).__getitem__, selected) for c in columns])
+            for predicate in predicates:
+                selected = [i for i in selected if predicate(rows[i])]
+            if selected:
+                yield list(selected)
+
+    def _execute(self, output):
+        """
+        Run the plan.
+        :param output: The columns to read for each matching row, which must include the order_by() columns.
+        :return: An iterator of (row index, tuple of values) pairs.
+        """
+        slots = {column_header: i for i, column_header in enumerate(output)}
+        positions, ordered = self._candidates()
+        limit = self._limit
+        if limit is not None and limit <= 0:
+            return iter([])
+        # The output columns are only read for the matching rows.
+        if output:
+            matches = chain.from_iterable(izip(selected, self._read(output, selected))
+                                          for selected in self._matches(positions))
+        else:
+            matches = izip(chain.from_iterable(self._matches(positions)), repeat(()))
+        if not self._order or ordered:
+            if limit is None:
+                return matches
+            return islice(matches, limit)
+        result = list(matches)
+        for column_header, descending in reversed(self._order):
+            slot = slots[column_header]
+            if descending:
+                result.sort(key=lambda item: (item[1][slot] is not None, item[1][slot]), reverse=True)
+            else:
+                result.sort(key=lambda item: (item[1][slot] is None, item[1][slot]))
+        return iter(result if limit is None else result[:limit])
+
+    def __iter__(self):
+        output = self.column_headers
+        width = len(output)
+        for column_header, descending in self._order:
+            if column_header not in output:
+                output.append(column_header)
+        if len(output) == width:
+            return imap(operator.itemgetter(1), self._execute(output))
+        return (values[:width] for i, values in self._execute(output))
+
+    def rows(self):
+        """
+        Iterate over the matching rows of the table in result order. Only the order_by() columns are read.
+        :return: An iterator of rows.
+        """
+        output = []
+        for column_header, descending in self._order:
+            if column_header not in output:
+                output.append(column_header)
+        return imap(self._table._rows.__getitem__, imap(operator.itemgetter(0), self._execute(output)))
+
+    def to_table(self, columnar=None):
+        """
+        Run the query into a new VTable holding the selected columns. Typed columns keep their dtypes.
+        :param columnar: Store the new table in a ColumnStore, defaults to the storage of the queried table.
+        :return: VTable
+        """
+        column_headers = self.column_headers
+        if columnar is None:
+            columnar = self._table.columnar
+        dtypes = {c: dtype for c, dtype in self._table.dtypes.items() if c in column_headers}
+        table = VTable(column_headers, [], columnar=columnar, dtypes=dtypes)
+        result = list(self)
+        if result:
+            table._load_columns([list(values) for values in izip(*result)])
+        return table